@@ -1,8 +1,7 @@
-import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
 
-import matplotlib.pyplot as plt
-import matplotlib.animation as anim
 import simple_pid
 
 try:
@@ -12,6 +11,35 @@ except ModuleNotFoundError:
     from automation.connection_type import SocketEthernetDevice
     from automation.device_type import Heater
 
+try:
+    from numba import njit  # optional, compiles the PID step to machine code
+except ModuleNotFoundError:
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+_PID_FILTER_N = 20  # the derivative is low-pass filtered with a time constant of Td/N, where Td = Kd/Kp
+
+
+@njit(cache=True, fastmath=True)
+def _pid_kernel(err, temp, last_err, last_input, last_diff, last_out, kp, bi, ad, bd, out_lo, out_hi):
+    """
+    Arithmetic of one incremental PID step, see HeaterAssembly._pid_step(). Takes and returns only floats, so that
+    numba can compile it when installed.
+
+    Returns
+    -------
+    tuple of float
+        the new output, within out_lo and out_hi, and the new derivative contribution.
+    """
+    diff = ad * last_diff - bd * (temp - last_input)
+    out = last_out + kp * (err - last_err) + diff - last_diff
+    integ = bi * err
+    # conditional integration: skip the integral when it would push a saturated output further past its limit
+    integ *= not ((out + integ > out_hi and integ > 0.0) or (out + integ < out_lo and integ < 0.0))
+    out = min(out_hi, max(out_lo, out + integ))
+    return out, diff
+
 
 class HeaterAssembly:
     def __init__(
@@ -19,6 +47,7 @@ class HeaterAssembly:
             supply_and_channel,
             daq_and_channel,
             heater=None,
+            async_temp=False,
     ):
         """
         A heater assembly composed of a heater, a temperature measuring device, and a power supply. This assembly
@@ -36,18 +65,32 @@ class HeaterAssembly:
         heater : Heater
             Object that contains the MAX temperature, MAX current, and MAX volts based on the physical heater
             hardware. If none is provided, the class will create an instance of the Heater class to use.
+        async_temp : bool
+            If True, update_supply() reads the temperature in a background thread, and the PID uses the newest reading
+            that is ready, which can be up to one update old. Useful for DAQs with slow conversions, so that the update
+            does not wait for them.
         """
 
-        self._supply_and_channel = supply_and_channel
-        self._daq_and_channel = daq_and_channel
+        self._ps, self._ps_ch = supply_and_channel
+        self._daq, self._daq_ch = daq_and_channel
+        self._set_ps_voltage = self._ps.set_voltage  # bound once, called on every PID update
+        self._get_daq_temp = self._daq.get_temp
         self._heater = heater
         if self._heater is None:
             self._heater = Heater()
         self._pid = self._get_default_pid()
-        self._MAX_voltage = min(self._heater.MAX_volts, self._supply_and_channel[0].MAX_voltage)
-        self._MAX_current = min(self._heater.MAX_current, self._supply_and_channel[0].MAX_current)
+        self._MAX_voltage = min(self._heater.MAX_volts, self._ps.MAX_voltage)
+        self._MAX_current = min(self._heater.MAX_current, self._ps.MAX_current)
         self._MAX_temp_limit = self._heater.MAX_temp
         self._regulating = False
+        self._async_temp = async_temp
+        self._temp_pool = None  # ThreadPoolExecutor for async_temp, created on first use
+        self._temp_future = None  # background temperature read in progress
+        self._temp_stale = False  # True if the result of _temp_future must not be used, see set_pid_regulation()
+        self._last_temp = None  # newest temperature from the background reads
+        self._reset_pid_state()
+        self._recompute_gains()
+        _pid_kernel(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)  # compile now, not on the first step
 
     # Assembly
     # --------
@@ -62,8 +105,8 @@ class HeaterAssembly:
             PID object with default values.
         """
         pid = simple_pid.PID()
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         out_max = min(self._heater.MAX_volts, ps.get_voltage_limit(ch))
 
         pid.Kp = 0.4
@@ -75,30 +118,101 @@ class HeaterAssembly:
 
         return pid
 
+    def _recompute_gains(self):
+        """
+        Precompute the PID coefficients used by update_supply() from the gains, sample time, and output limits stored
+        in self._pid, so that each step is only a handful of float operations. Needs to be called every time any of
+        these settings change.
+        """
+        pid = self._pid
+        T = pid.sample_time
+        tf = pid.Kd / (pid.Kp * _PID_FILTER_N) if pid.Kp else 0.0  # derivative filter time constant, Td/N
+        self._kp = float(pid.Kp)
+        self._bi = float(pid.Ki) * T  # integral contribution per sample
+        self._ad = tf / (tf + T)  # share of the last derivative contribution kept by the filter
+        self._bd = float(pid.Kd) / (tf + T)  # derivative contribution per unit temperature change
+        self._out_lo, self._out_hi = (float(lim) for lim in pid.output_limits)
+        self._sample_time_ns = int(pid.sample_time * 1e9)
+
+    def _reset_pid_state(self):
+        """
+        Forget the previous PID steps. The next step starts again from an output of 0.
+        """
+        self._last_err = 0.0
+        self._last_input = None
+        self._last_diff = 0.0
+        self._last_out = 0.0
+        self._next_step_ns = 0  # time.monotonic_ns() deadline of the next step
+
+    def _pid_step(self, temp):
+        """
+        One step of an incremental (velocity form) PID. Only the change of each term since the last step is added to
+        the last output, and the integral is not added when it would push the output past its limits, so the
+        integral does not wind up while the output is saturated. The derivative acts on the
+        temperature instead of the error, so that setpoint changes do not kick the output, and is low-pass filtered
+        so that measurement noise is not amplified. Like simple_pid, returns the last output if called before the
+        next step is due. Steps are due every sample_time seconds, counted from the previous deadline rather than the
+        previous call, so that calls made on a sample_time period do not drift.
+
+        Parameters
+        ----------
+        temp : float
+            the current temperature.
+
+        Returns
+        -------
+        float
+            the new output, within the output limits.
+        """
+        now = time.monotonic_ns()
+        if now < self._next_step_ns:
+            return self._last_out
+        self._next_step_ns += self._sample_time_ns
+        if self._next_step_ns <= now:  # first step, or more than a period late: restart the period from now
+            self._next_step_ns = now + self._sample_time_ns
+
+        last_input = temp if self._last_input is None else self._last_input
+        err = self._pid.setpoint - temp
+        out, diff = _pid_kernel(
+            float(err), float(temp), self._last_err, float(last_input), self._last_diff, self._last_out,
+            self._kp, self._bi, self._ad, self._bd, self._out_lo, self._out_hi
+        )
+
+        self._last_err = err
+        self._last_input = temp
+        self._last_diff = diff
+        self._last_out = out
+        return out
+
     def reset_pid(self):
         """
         Resets the pid settings to their default values. Output limits set based on power supply and heater limit
         voltage.
         """
         self._pid = self._get_default_pid()
+        self._reset_pid_state()
+        self._recompute_gains()
 
     def reset_pid_limits(self):
         """
-        Reset PID output limits based on heater and power supply limit voltage.
+        Reset PID output limits based on heater and power supply limit voltage. This is the only place where the PID
+        reads the limit from the power supply. update_supply() clamps with the stored limits, so this is called again
+        whenever the supply or heater voltage limit is changed through the assembly.
         """
         pid = self._pid
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         out_max = min(self.MAX_voltage, ps.get_voltage_limit(ch))
 
         pid.output_limits = (0, out_max)
+        self._recompute_gains()
 
     def stop_supply(self):
         """
         Turn off supply channel, set voltage and current to 0.
         """
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         ps.set_channel_state(ch, False)
         ps.set_voltage(ch, 0)
         ps.set_current(ch, 0)
@@ -108,8 +222,8 @@ class HeaterAssembly:
         Turn off supply channel, set voltage and current to 0, and reset voltage and current limits based on power
         supply max limits.
         """
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         ps.set_channel_state(ch, False)
         ps.set_voltage(ch, 0)
         ps.set_current(ch, 0)
@@ -121,8 +235,8 @@ class HeaterAssembly:
         set voltage and current limits based on heater and power supply limits, set the setpoint current to the
         channel current limit, and turn on the supply channel.
         """
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         ps.set_voltage(ch, 0)
         ps.set_current(ch, 0)
         if ps.get_voltage_limit(ch) > self.MAX_voltage:
@@ -138,8 +252,8 @@ class HeaterAssembly:
         and heater limits.
         Reset PID to default values.
         """
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         self.reset_power_supply()
         ps.set_voltage_limit(ch, self.MAX_voltage)
         ps.set_current_limit(ch, self.MAX_current)
@@ -154,6 +268,14 @@ class HeaterAssembly:
         self.set_pid_regulation(False)
         self._pid.setpoint = 0
 
+    @property
+    def supply_and_channel(self):
+        return self._ps, self._ps_ch
+
+    @property
+    def daq_and_channel(self):
+        return self._daq, self._daq_ch
+
     @property
     def MAX_voltage(self):
         return self._MAX_voltage
@@ -173,80 +295,83 @@ class HeaterAssembly:
     # Power supply
     # ------------
     def get_supply_channel(self):
-        return self._supply_and_channel[1]
+        return self._ps_ch
 
     def set_supply_channel(self, new_ch):
-        ps = self._supply_and_channel[0]
+        ps = self._ps
         err = ps.check_valid_channel(new_ch)
         if err is None:
             ps.zero_all_channels()
-            self._supply_and_channel[1] = new_ch
+            self._ps_ch = new_ch
         return err
 
     def get_supply_channel_state(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_channel_state(ch)
 
     def set_supply_channel_state(self, state):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.set_channel_state(ch, state)
 
     def get_supply_setpoint_voltage(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_setpoint_voltage(ch)
 
     def set_supply_voltage(self, volts):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.set_voltage(ch, volts)
 
     def get_supply_actual_voltage(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_actual_voltage(ch)
 
     def get_supply_setpoint_current(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_setpoint_current(ch)
 
     def set_supply_current(self, amps):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.set_current(ch, amps)
 
     def get_supply_actual_current(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_actual_current(ch)
 
     def get_supply_voltage_limit(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_voltage_limit(ch)
 
     def set_supply_voltage_limit(self, volts):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
-        return ps.set_voltage_limit(ch, volts)
+        ps = self._ps
+        ch = self._ps_ch
+        err = ps.set_voltage_limit(ch, volts)
+        if err is not None:
+            return err
+        self.reset_pid_limits()
 
     def get_supply_current_limit(self):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.get_current_limit(ch)
 
     def set_supply_current_limit(self, amps):
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
+        ps = self._ps
+        ch = self._ps_ch
         return ps.set_current_limit(ch, amps)
 
     @property
     def power_supply(self):
-        out = 'IDN: ' + self._supply_and_channel[0].idn + '\n' \
-              + 'IP4 Address: ' + self._supply_and_channel[0].ip4_address
+        out = 'IDN: ' + self._ps.idn + '\n' \
+              + 'IP4 Address: ' + self._ps.ip4_address
         return out
 
     @property
@@ -287,53 +412,51 @@ class HeaterAssembly:
 
     @property
     def supply_channel(self):
-        return self._supply_and_channel[1]
+        return self._ps_ch
 
     @property
     def supply_number_of_channels(self):
-        return self._supply_and_channel[0].number_of_channels
+        return self._ps.number_of_channels
 
     @property
     def supply_MAX_voltage(self):
-        return self._supply_and_channel[0].MAX_voltage
+        return self._ps.MAX_voltage
 
     @property
     def supply_MAX_current(self):
-        return self._supply_and_channel[0].MAX_current
+        return self._ps.MAX_current
 
     # Temp DAQ
     # --------
     def get_daq_temp(self):
-        dq = self._daq_and_channel[0]
-        ch = self._daq_and_channel[1]
-        return dq.get_temp(ch)
+        return self._get_daq_temp(self._daq_ch)
 
     def get_daq_channel(self):
-        return self._daq_and_channel[1]
+        return self._daq_ch
 
     def set_daq_channel(self, new_ch):
-        dq = self._daq_and_channel[0]
+        dq = self._daq
         err = dq.check_valid_temp_channel(new_ch)
         if err is None:
-            self._daq_and_channel[1] = new_ch
+            self._daq_ch = new_ch
         else:
             return 'ERROR: channel not found'
 
     def get_daq_tc_type(self):
-        dq = self._daq_and_channel[0]
-        ch = self._daq_and_channel[1]
+        dq = self._daq
+        ch = self._daq_ch
         return dq.get_thermocouple_type(ch)
 
     def set_daq_tc_type(self, new_tc):
-        dq = self._daq_and_channel[0]
-        ch = self._daq_and_channel[1]
+        dq = self._daq
+        ch = self._daq_ch
         return dq.set_thermocouple_type(ch, new_tc)
 
     def get_daq_temp_units(self):
-        return self._daq_and_channel[0].default_units
+        return self._daq.default_units
 
     def set_daq_temp_units(self, new_units):
-        dq = self._daq_and_channel[0]
+        dq = self._daq
         err = dq.check_valid_units(new_units)
         if err is None:
             dq.default_units = new_units
@@ -342,8 +465,8 @@ class HeaterAssembly:
 
     @property
     def daq(self):
-        out = 'IDN: ' + self._daq_and_channel[0].idn + '\n' \
-              + 'IP4 Address: ' + self._daq_and_channel[0].ip4_address
+        out = 'IDN: ' + self._daq.idn + '\n' \
+              + 'IP4 Address: ' + self._daq.ip4_address
         return out
 
     @property
@@ -352,21 +475,21 @@ class HeaterAssembly:
 
     @property
     def daq_channel(self):
-        return self._daq_and_channel[1]
+        return self._daq_ch
 
     @property
     def tc_type(self):
-        dq = self._daq_and_channel[0]
-        ch = self._daq_and_channel[1]
+        dq = self._daq
+        ch = self._daq_ch
         return dq.get_thermocouple_type(ch)
 
     @property
     def temp_units(self):
-        return self._daq_and_channel[0].default_units
+        return self._daq.default_units
 
     @property
     def daq_number_of_temp_channels(self):
-        return self._daq_and_channel[0].number_temp_channels
+        return self._daq.number_temp_channels
 
     # PID settings
     # ------------
@@ -388,6 +511,7 @@ class HeaterAssembly:
         if seconds < 1:
             return 'ERROR: sample time of ' + str(seconds) + ' is invalid. Use larger or equal to 1 second.'
         self._pid.sample_time = seconds
+        self._recompute_gains()
 
     def get_pid_regulation(self):
         return self._regulating
@@ -396,6 +520,7 @@ class HeaterAssembly:
         if type(reg) is not int and type(reg) is not bool:
             return 'ERROR: type ' + str(type(reg)) + ' not supported'
         self._regulating = bool(reg)
+        self._temp_stale = True  # a background reading from before this change would be stale
 
     @property
     def pid_settings(self):
@@ -421,6 +546,7 @@ class HeaterAssembly:
     @pid_kp.setter
     def pid_kp(self, new_kp):
         self._pid.Kp = new_kp
+        self._recompute_gains()
 
     @property
     def pid_ki(self):
@@ -429,6 +555,7 @@ class HeaterAssembly:
     @pid_ki.setter
     def pid_ki(self, new_ki):
         self._pid.Ki = new_ki
+        self._recompute_gains()
 
     @property
     def pid_kd(self):
@@ -437,6 +564,7 @@ class HeaterAssembly:
     @pid_kd.setter
     def pid_kd(self, new_kd):
         self._pid.Kd = new_kd
+        self._recompute_gains()
 
     # Heater settings
     # ---------------
@@ -461,14 +589,15 @@ class HeaterAssembly:
             return 'new heater MAX volts not valid: actual volts or setpoint volts is higher'
         else:
             self._heater.MAX_volts = new_volts
-            self._MAX_voltage = min(self._heater.MAX_volts, self._supply_and_channel[0].MAX_voltage)
+            self._MAX_voltage = min(self._heater.MAX_volts, self._ps.MAX_voltage)
+            self.reset_pid_limits()
 
     def set_heater_MAX_current(self, new_amps):
         if new_amps < self.get_supply_actual_current() or new_amps < self.get_supply_setpoint_current():
             return 'new heater MAX current not valid: actual current or setpoint current is higher'
         else:
             self._heater.MAX_current = new_amps
-            self._MAX_current = min(self._heater.MAX_current, self._supply_and_channel[0].MAX_current)
+            self._MAX_current = min(self._heater.MAX_current, self._ps.MAX_current)
 
     # -----------------------------------------------------------------------------
     # methods
@@ -476,48 +605,91 @@ class HeaterAssembly:
     def update_supply(self):
         """
         Calculates the new power supply voltage using the PID function based on the current temperature from the
-        temperature daq channel. It then sets the power supply channel voltage to this new voltage.
+        temperature daq channel. It then sets the power supply channel voltage to this new voltage. The gains,
+        setpoint, and limits are the ones of the simple_pid object, see _pid_step().
+
+        Returns
+        -------
+        tuple of float
+            If succesful, the new supply voltage and the temperature it was computed from.
+        str
+            Else, return error string
         """
-        ps = self._supply_and_channel[0]
-        ch = self._supply_and_channel[1]
-        new_volts = self._pid(round(self.temp, 2))
+        temp = self._get_pid_temp()
+        if type(temp) is str:
+            return temp
+        new_volts = self._pid_step(round(temp, 2))
 
-        err = ps.set_voltage(channel=ch, volts=new_volts)
+        err = self._set_ps_voltage(channel=self._ps_ch, volts=new_volts)
         if err is not None:
             return err
 
-        out = self.get_daq_temp()
-        return out
+        return new_volts, temp
+
+    def _get_pid_temp(self):
+        """
+        Temperature used as the input of the PID. With async_temp, return the newest reading finished by the
+        background thread and start the next one, so that the PID step does not wait for the DAQ. Only the first call
+        after the regulation is switched on waits for a reading, after any read still running from before.
+        """
+        if not self._async_temp:
+            return self.get_daq_temp()
+
+        future = self._temp_future
+        if future is None or self._temp_stale:
+            if future is not None:
+                wait((future,))  # let the stale read finish first, so that the DAQ is never read twice at once
+            self._temp_stale = False
+            self._last_temp = self.get_daq_temp()
+        elif future.done():
+            self._last_temp = future.result()
+
+        if future is None or future.done():
+            if self._temp_pool is None:
+                self._temp_pool = ThreadPoolExecutor(max_workers=1)
+            self._temp_future = self._temp_pool.submit(self.get_daq_temp)
+
+        return self._last_temp
 
     def live_plot(self, x_size=10):
         """
         plots current temp and ps_volts
         :param x_size: number of data points per frame
         """
-        temp = [0.0] * x_size
-        ps_v = [0.0] * x_size
-        time_ = [0.0] * x_size
+        import matplotlib.pyplot as plt  # only needed here, and slow to import on the BeagleBone
+        import matplotlib.animation as anim
+
+        temp = deque([0.0] * x_size, maxlen=x_size)  # appending drops the oldest point
+        ps_v = deque([0.0] * x_size, maxlen=x_size)
+        time_ = deque([0.0] * x_size, maxlen=x_size)
         fig = plt.figure()
         ax = plt.subplot(111)
+        line_temp, = ax.plot([], [])  # artists are created once and only updated by animate()
+        line_ps, = ax.plot([], [])
+        txt_temp = ax.text(0, 0, '')
+        txt_ps = ax.text(0, 0, '')
 
         def animate(i):
-            ps_volt = self.update_supply()
+            out = self.update_supply()
+            if type(out) is str:
+                print(out)
+                return line_temp, line_ps, txt_temp, txt_ps
+            ps_volt, t_now = out
 
-            temp.pop(0)
-            temp.append(self.temp)
-
-            time_.pop(0)
+            temp.append(t_now)
             time_.append(i)
-
-            ps_v.pop(0)
             ps_v.append(ps_volt)
 
-            ax.cla()
-            ax.plot(time_, temp)
-            ax.plot(time_, ps_v)
-            ax.text(time_[-1], temp[-1] + 2, str(temp[-1]))
-            ax.text(time_[-1], ps_v[-1] + 2, str(ps_v[-1]))
+            line_temp.set_data(time_, temp)
+            line_ps.set_data(time_, ps_v)
+            txt_temp.set_position((time_[-1], temp[-1] + 2))
+            txt_temp.set_text('%.3f' % temp[-1])
+            txt_ps.set_position((time_[-1], ps_v[-1] + 2))
+            txt_ps.set_text('%.3f' % ps_v[-1])
+            ax.relim()
+            ax.autoscale_view(scaley=False)
             ax.set_ylim([0, self._pid.setpoint * 1.3])
+            return line_temp, line_ps, txt_temp, txt_ps
 
         ani = anim.FuncAnimation(fig, animate, interval=2000)
         plt.show()
@@ -530,7 +702,7 @@ class Oven(SocketEthernetDevice):
     BeagleBoneBlack acts as the "brain" of the oven, commanding the different HeaterAssembly objects.
     """
     def __init__(self, ip4_address, port=65432, ):
-        super().__init__(ip4_address, port)
+        super().__init__(ip4_address, port, terminator=b'\r')
 
     @property
     def idn(self):
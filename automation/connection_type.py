@@ -2,15 +2,32 @@
 Created on Thursday, April 7, 2022
 @author: Sebastian Miki-Silva
 """
+import asyncio
 import socket
 import time
 
 
 class SocketEthernetDevice:
+    __slots__ = (
+        '_ip4_address',
+        '_port',
+        '_terminator',
+        '_min_interval',
+        '_query_timeout',
+        '_last_sent',
+        '_socket',
+        '_reader',
+        '_writer',
+        '_is_connected',
+    )
+
     def __init__(
             self,
             ip4_address,
             port,
+            terminator=b'\n',
+            min_interval=0,
+            query_timeout=2,
     ):
 
         """
@@ -22,11 +39,25 @@ class SocketEthernetDevice:
             The IPv4 address of the device.
         port : int
             The port number used to connect the device. Can be any number between 49152 and 65536.
+        terminator : bytes
+            The bytes that mark the end of every reply from the device. Replies are read until the terminator is
+            received.
+        min_interval : float
+            Minimum time in seconds between two consecutive messages sent to the device. Only needed for devices that
+            drop messages arriving too close to each other.
+        query_timeout : float
+            Time in seconds to wait for a reply to a query. Connecting to the device still waits up to 15 seconds.
         """
 
         self._ip4_address = ip4_address
         self._port = port
+        self._terminator = terminator
+        self._min_interval = min_interval
+        self._query_timeout = query_timeout
+        self._last_sent = 0
         self._socket = None
+        self._reader = None  # asyncio streams, only set after aconnect()
+        self._writer = None
         self._is_connected = False
 
         self.connect()
@@ -43,7 +74,8 @@ class SocketEthernetDevice:
         Returns
         -------
         bytes
-            Returns the raw reply of the ethernet device as bytes.
+            Returns the raw reply of the ethernet device as bytes, or error string if the terminator does not arrive
+            within query_timeout seconds.
 
         Raises
         ------
@@ -51,18 +83,22 @@ class SocketEthernetDevice:
             If there is an error with the socket object, raise OSError. Might be fixed by using self.connect()
         """
 
+        reply = b''
         try:
-            self._socket.sendall(qry)
-            time.sleep(0.3)
-            self._socket.settimeout(15)
+            self._send(qry)
             reply = self._socket.recv(4096)
-            time.sleep(0.3)
+            while reply and not reply.endswith(self._terminator):  # reply may arrive split in several packets
+                packet = self._socket.recv(4096)
+                if not packet:
+                    break
+                reply += packet
         except TimeoutError:
+            if reply:  # the terminator never arrived. Do not let a cut-off reply pass as a full one
+                return 'ERROR: incomplete reply from device for query ' + str(qry) + '. Received: ' + str(reply)
             return 'ERROR: No response from device for query ' + str(qry)
         except OSError:
             return 'ERROR: Query not sent. Try using the connect() method first.'
 
-
         return reply
 
     def _command(self, cmd):
@@ -81,35 +117,141 @@ class SocketEthernetDevice:
         """
 
         try:
-            out = self._socket.sendall(cmd)
-            time.sleep(0.3)
+            out = self._send(cmd)
         except OSError:
             return 'ERROR: Socket not found. Command not sent. Try using the connect() method first.'
 
         return out
 
+    def _send(self, msg):
+        """
+        send a message through the socket, waiting first until min_interval seconds have passed since the last
+        message.
+
+        Parameters
+        ----------
+        msg : bytes
+            The message to send through the socket connection.
+
+        Returns
+        -------
+        None
+        """
+        if self._min_interval:
+            wait = self._last_sent + self._min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+        out = self._socket.sendall(msg)
+        self._last_sent = time.monotonic()
+        return out
+
+    async def _aquery(self, qry):
+        """
+        Coroutine version of _query(). Needs the asyncio streams opened by aconnect().
+
+        Parameters
+        ----------
+        qry : bytes
+            The message to send through the socket connection.
+
+        Returns
+        -------
+        bytes
+            Returns the raw reply of the ethernet device as bytes, or error string.
+        """
+        try:
+            await self._asend(qry)
+            reply = await asyncio.wait_for(self._reader.readuntil(self._terminator), self._query_timeout)
+        except asyncio.TimeoutError:
+            return 'ERROR: No response from device for query ' + str(qry)
+        except (OSError, AttributeError, asyncio.IncompleteReadError):
+            return 'ERROR: Query not sent. Try using the aconnect() method first.'
+
+        return reply
+
+    async def _acommand(self, cmd):
+        """
+        Coroutine version of _command(). Needs the asyncio streams opened by aconnect().
+
+        Parameters
+        ----------
+        cmd : bytes
+            Python btyes containing the command. Dependent on each individual device.
+
+        Returns
+        -------
+        None
+            Returns None if the command is succesfully sent, else error string.
+        """
+        try:
+            await self._asend(cmd)
+        except (OSError, AttributeError):
+            return 'ERROR: Socket not found. Command not sent. Try using the aconnect() method first.'
+
+    async def _asend(self, msg):
+        """
+        Coroutine version of _send(). Waits without blocking the event loop.
+        """
+        if self._min_interval:
+            wait = self._last_sent + self._min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        self._writer.write(msg)
+        await self._writer.drain()
+        self._last_sent = time.monotonic()
+
+    def set_ip4_address(self, new_ip):
+        """
+        Change the IPv4 address used by connect(). The connection must be closed first using disconnect().
+
+        Parameters
+        ----------
+        new_ip : str
+            The new IPv4 address of the device.
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, return error string
+        """
+        if self._is_connected:
+            return 'ERROR: ip4_address cannot be changed while connection is on. Use disconnect() first.'
+
+        self._ip4_address = new_ip
+
+    def set_port(self, new_port):
+        """
+        Change the port used by connect(). The connection must be closed first using disconnect().
+
+        Parameters
+        ----------
+        new_port : int
+            The new port number used to connect the device.
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, return error string
+        """
+        if self._is_connected:
+            return 'ERROR: port cannot be changed while connection is on. Use disconnect() first.'
+
+        self._port = new_port
+
     @property
     def ip4_address(self):
         return self._ip4_address
 
-    # @ip4_address.setter
-    # def ip4_address(self, new_ip):
-    #     if not self._is_connected:
-    #         self._ip4_address = new_ip
-    #     else:
-    #         raise AttributeError('ERROR: ip4_address cannot be changed while conenction is on.')
-
     @property
     def port(self):
         return self._port
 
-    # @port.setter
-    # def port(self, new_port):
-    #     if not self._is_connected:
-    #         self._port = new_port
-    #     else:
-    #         raise AttributeError('ERROR: port cannot be changed while connection is on.')
-
     @property
     def idn(self):
         """
@@ -138,8 +280,12 @@ class SocketEthernetDevice:
             If 10 attempts to connect fail, raise OSError.
         """
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # messages are tiny, send them right away
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)  # detect devices that dropped off the network
+        sock.settimeout(15)
         try:
             sock.connect((self._ip4_address, self._port))
+            sock.settimeout(self._query_timeout)
             self._socket = sock
             self._is_connected = True
             print('Connection to', self._ip4_address, 'was succesful.')
@@ -149,6 +295,7 @@ class SocketEthernetDevice:
             for i in range(10):
                 try:
                     sock.connect((self._ip4_address, self._port))
+                    sock.settimeout(self._query_timeout)
                     self._socket = sock
                     self._is_connected = True
                     print('Connection to', self._ip4_address, 'was succesful.')
@@ -165,6 +312,34 @@ class SocketEthernetDevice:
         self._socket.close()
         self._is_connected = False
 
+    async def aconnect(self):
+        """
+        Open asyncio streams to the device so that many devices can be polled concurrently from one event loop using
+        the coroutine methods. If the device is already connected, the existing socket is handed over to the streams.
+        After that, use only the coroutine methods, since the socket is no longer blocking.
+
+        Returns
+        -------
+        None
+            If succesful, returns None
+        """
+        if self._is_connected:
+            self._reader, self._writer = await asyncio.open_connection(sock=self._socket)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self._ip4_address, self._port)
+            self._socket = self._writer.get_extra_info('socket')
+            self._is_connected = True
+
+    async def adisconnect(self):
+        """
+        Close the asyncio streams and the socket connection.
+        """
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._reader = None
+        self._writer = None
+        self._is_connected = False
+
 #
 # class SerialConnection:
 #     def __int__(
@@ -2,12 +2,13 @@
 Created on Thursday, April 7, 2022
 @author: Sebastian Miki-Silva
 """
+import functools
 import numpy as np
 import serial
+import struct
 import time
 from serial import Serial
 from sys import platform
-import pyvisa
 try:
     from mcculw import ul
     from mcculw import enums
@@ -43,7 +44,72 @@ except ModuleNotFoundError:
 # ======================================================================================================================
 # Gaussmeters
 # ======================================================================================================================
+# For each command of the AlphaLab communication protocol: the 6-byte payload, and the number of bytes in the response
+# including the trailing acknowledgement byte. Only the first byte of the payload matters, but the gaussmeter expects
+# the command code repeated 6 times. FF (flush) has no response.
+_GM3_COMMANDS = {
+    code: (bytes.fromhex(code) * 6, read_size)
+    for code, read_size in (('01', 21), ('02', 21), ('03', 31), ('04', 32), ('08', 21), ('FF', None))
+}
+_GM3_FLUSH = _GM3_COMMANDS['FF'][0]
+_GM3_STREAM_DATA_SIZE = _GM3_COMMANDS['03'][1]
+_GM3_ACK_DONE = 7  # last byte of the final response packet of a multi-packet reply
+_GM3_MAX_ATTEMPTS = 10  # attempts to get a complete response before giving up on a query
+_GM3_MAX_PACKETS = 16  # packets to request before giving up on a multi-packet reply
+# time, x-field, y-field, z-field, and total field. Each measurable is 6 bytes: a header byte, a sign and magnitude
+# byte, and 4 bytes of raw digits in big-endian order.
+_GM3_MEASURABLES = struct.Struct('>' + 'BBI' * 5)
+# Signed divisor for each value of bits 00001111 of byte 2: bit 00001000 is the sign (1 is negative), and bits
+# 00000111 are the order of magnitude. A single lookup then replaces the sign check and the power of ten.
+_GM3_DIVISORS = tuple((-1 if i & 0b00001000 else 1) * 10 ** (i & 0b00000111) for i in range(16))
+_GM3_DIVISORS_ARRAY = np.array(_GM3_DIVISORS, dtype=np.float64)
+
+
+def _decode_gm3_measurables(stream):
+    """
+    Decode the 5 measurables at the start of a gaussmeter stream. See Gm3._parse_measurables for the format.
+
+    Parameters
+    ----------
+    stream : bytes, bytearray, or memoryview
+        at least 30 bytes received from the gaussmeter. Read in place, without copying.
+
+    Returns
+    -------
+    list of floats
+    """
+    fields = _GM3_MEASURABLES.unpack_from(stream)
+    div = _GM3_DIVISORS
+    return [raw / div[b2 & 0b00001111] for b2, raw in zip(fields[1::3], fields[2::3])]
+
+
+def _decode_gm3_measurables_array(raw, n, frame_size):
+    """
+    Decode n consecutive gaussmeter frames at once. See Gm3._parse_measurables for the format.
+
+    Parameters
+    ----------
+    raw : bytes or bytearray
+        n frames of frame_size bytes each, one after the other.
+    n : int
+        number of frames.
+    frame_size : int
+        size of each frame in bytes, including the trailing acknowledgement byte.
+
+    Returns
+    -------
+    numpy.ndarray
+        array of shape (n, 5). Each row contains time, x-field, y-field, z-field, and total magnitude.
+    """
+    frames = np.frombuffer(raw, dtype=np.uint8).reshape(n, frame_size)[:, :30].reshape(n, 5, 6)
+    b2 = frames[:, :, 1]
+    digits = np.ascontiguousarray(frames[:, :, 2:6]).view('>u4')[:, :, 0]
+    return digits / _GM3_DIVISORS_ARRAY[b2 & 0b00001111]
+
+
 class Gm3:
+    __slots__ = ('_ser', '_error_count')
+
     def __init__(self, port, tmout=3):
         """
         Parameters
@@ -61,10 +127,19 @@ class Gm3:
             stopbits=1,
             timeout=tmout
         )
+        self._error_count = 0  # number of failed query attempts since the gaussmeter was connected
+
+        # The USB-serial adapter batches incoming bytes for up to 16 ms by default. On Linux, ask the driver to pass
+        # them on right away. Not every adapter or platform supports it.
+        if hasattr(self._ser, 'set_low_latency_mode'):
+            try:
+                self._ser.set_low_latency_mode(True)
+            except (ValueError, OSError):
+                pass
 
         self.flush_buffer()
 
-    def _query_(self, qry, read_size):
+    def _query_(self, qry, read_size=None):
         """
         send a 6-length bytes object from qry message. Read the corresponding number of bytes.
 
@@ -73,20 +148,32 @@ class Gm3:
         qry : str
             command code from AlphaLab communication protocol. Format is two digits: 00.
         read_size : int
-            number of bytes to receive from gaussmeter
+            number of bytes to receive from gaussmeter. If None, the known response size of the command is used.
 
         Returns
         -------
         bytes
             the stream of bytes from the gaussmeter.
         """
-        for i in range(10):
-            self._ser.write(bytes.fromhex(qry * 6))  # only first byte matters
-            out = self._ser.read(read_size)
-            time.sleep(0.01)
+        command = _GM3_COMMANDS.get(qry)
+        if command is None:
+            payload, known_size = bytes.fromhex(qry) * 6, None
+        else:
+            payload, known_size = command
+
+        if read_size is None:
+            read_size = known_size
+            if read_size is None:
+                raise KeyError('Unknown response size for gaussmeter command: ' + str(qry))
+
+        for i in range(_GM3_MAX_ATTEMPTS):
+            self._ser.write(payload)
+            out = self._ser.read(read_size)  # response and acknowledgement byte in a single read
             if len(out) == read_size:
                 return out
-            time.sleep(0.3)
+            self._error_count += 1
+            time.sleep(min(0.01 * 2**i, 0.3))  # back off, up to 0.3 s, to give the gaussmeter time to recover
+            self._ser.reset_input_buffer()  # drop any partial response left over from this attempt
             self.flush_buffer()
 
         return 'ERROR: could not sent query: ' + str(qry)
@@ -107,7 +194,7 @@ class Gm3:
 
         Parameters
         ----------
-        stream : bytes
+        stream : bytes, bytearray, or memoryview
             the stream of bytes received from the gaussmeter. Should be 31 bytes long for STREAM_DATA, or 32 bytes
             long for RESET_TIME.
 
@@ -117,21 +204,13 @@ class Gm3:
             contains the float values for the measurables in the following order: time, x-field, y-filed, z-field,
             and total magnitude.
         """
-        t, x, y, z, total = stream[0:6], stream[6:12], stream[12:18], stream[18:24], stream[24:30]
-        variables = [t, x, y, z, total]
-        out = []
-        for var in variables:  # var is a bytes object with 6 bytes
-            b1, b2, b3, b4, b5, b6 = var[0], var[1], var[2], var[3], var[4], var[5]  # bn variable are an int object
-            raw = b3*256**3 + b4*256**2 + b5*256 + b6
-            sign = (-2 * (b2 & 0b00001000) / 8) + 1  # if the bit is 1, sign is negative. If the bit is 0,
-            # sign is positive.
-            magn = 10 ** (b2 & 0b00000111)
-            out.append(raw*sign/magn)
+        if type(stream) is str or len(stream) < _GM3_MEASURABLES.size:  # _query_ returns str on error
+            raise IndexError('Gaussmeter stream is too short: ' + str(stream))
 
-        return out
+        return _decode_gm3_measurables(stream)
 
     def flush_buffer(self):
-        self._ser.write(bytes.fromhex('FF' * 6))
+        self._ser.write(_GM3_FLUSH)
 
     def autozero(self):
         pass
@@ -152,16 +231,49 @@ class Gm3:
         60 characters long.
         """
         try:
-            out = self._query_('03', 31)
+            out = self._query_('03')
             return self._parse_measurables(out)
         except IndexError:
             try:
                 self.flush_buffer()
-                out = self._query_('03', 31)
+                out = self._query_('03')
                 return self._parse_measurables(out)
             except IndexError:
                 return 'ERROR: field could not be measured. Check connection to gaussmeter.'
 
+    def get_datapoints(self, n):
+        """
+        query the gaussmeter for n consecutive readings of the time index, x-axis, y-axis, z-axis, and magnitude in
+        Gauss. The raw responses are collected into a single buffer and decoded together at the end, which is faster
+        than calling get_datapoint() n times when logging many readings.
+
+        Parameters
+        ----------
+        n : int
+            number of datapoints to take.
+
+        Returns
+        -------
+        numpy.ndarray
+            If succesful, array of shape (n, 5). Each row contains time (s), x-axis (G), y-axis (G), z-axis (G), and
+            magnitude (G).
+        str
+            Else, return error string
+        """
+        frame_size = _GM3_STREAM_DATA_SIZE
+        raw = bytearray(n * frame_size)
+        view = memoryview(raw)  # slices write into raw in place, and cannot change its size
+        for i in range(n):
+            frame = self._query_('03')
+            if type(frame) is str:
+                self.flush_buffer()
+                frame = self._query_('03')
+                if type(frame) is str:
+                    return 'ERROR: field could not be measured. Check connection to gaussmeter.'
+            view[i*frame_size:(i + 1)*frame_size] = frame
+
+        return _decode_gm3_measurables_array(raw, n, frame_size)
+
     def get_zfield(self):
         return self.get_datapoint()[3]
 
@@ -181,12 +293,12 @@ class Gm3:
         60 characters long.
         """
         try:
-            out = self._query_('04', 32)
+            out = self._query_('04')
             return self._parse_measurables(out)
         except IndexError:
             try:
                 self.flush_buffer()
-                out = self._query_('04', 32)
+                out = self._query_('04')
                 return self._parse_measurables(out)
             except IndexError:
                 return 'ERROR: field could not be measured. Check connection to gaussmeter.'
@@ -201,27 +313,50 @@ class Gm3:
 
         return abs(sum_ / i)
 
+    @property
+    def error_count(self):
+        return self._error_count
+
+    def _query_packets_(self, qry):
+        """
+        send a query whose response is split into several packets. The next packet is requested with the 08 command
+        until a packet ends with the 07 acknowledgement, up to _GM3_MAX_PACKETS packets.
+
+        Parameters
+        ----------
+        qry : str
+            command code from AlphaLab communication protocol. Format is two digits: 00.
+
+        Returns
+        -------
+        str
+            If succesful, the string representation of all the packets joined together.
+            Else, return error string.
+        """
+        out = bytearray()
+        packet = self._query_(qry)
+        for i in range(_GM3_MAX_PACKETS):
+            if type(packet) is str:
+                return packet
+            out += packet
+            if packet[-1] == _GM3_ACK_DONE:
+                return str(bytes(out))
+            packet = self._query_('08')  # read() waits for the packet, no need to sleep before asking for it
+
+        return 'ERROR: no end of response received for query: ' + str(qry)
+
     @property
     def idn(self):
-        out = self._query_('01', 21)
-        time.sleep(0.05)
-        while out[-1] != 7:
-            out += self._query_('08', 21)
-            time.sleep(0.05)
-        return str(out)
+        return self._query_packets_('01')
 
     @property
     def settings(self):
-        out = self._query_('02', 21)
-        time.sleep(0.05)
-        while out[-1] != 7:
-            out += self._query_('08', 21)
-            time.sleep(0.05)
-        return str(out)
+        return self._query_packets_('02')
 
 
 class Series9550:
     def __init__(self, gpib_address):
+        import pyvisa  # only needed for this GPIB device, and slow to import
         rm = pyvisa.ResourceManager()
         self._inst = rm.open_resource('GPIB0::' + str(gpib_address) + '::INSTR')
         self.clear()
@@ -271,11 +406,103 @@ class Series9550:
 # ======================================================================================================================
 # Power Supplies
 # ======================================================================================================================
+@functools.lru_cache(maxsize=256)
+def _encode_scpi(msg):
+    """
+    Encode an SCPI message using utf-8. Queries are constant strings and set commands tend to repeat the same values,
+    so the encoded bytes are kept for reuse.
+    """
+    return msg.encode('utf-8')
+
+
+class _ChannelLimit:
+    """
+    Property for the software voltage or current limit of one channel of a PowerSupply. The channel and the limit are
+    taken from the attribute name, which must follow the pattern ch<n>_<voltage or current>_limit. Setting the value
+    goes through set_voltage_limit() or set_current_limit(), so the usual checks apply.
+    """
+    def __set_name__(self, owner, name):
+        chan, quantity = name.split('_')[:2]
+        self._index = int(chan[2:]) - 1
+        self._limits_attr = '_channel_' + quantity + '_limits'
+        self._setter_name = 'set_' + quantity + '_limit'
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return float(getattr(obj, self._limits_attr)[self._index])
+
+    def __set__(self, obj, value):
+        getattr(obj, self._setter_name)(self._index + 1, value)
+
+
+class _Spd3303xChannel:
+    """
+    One output channel of a Spd3303x power supply. Holds the SCPI prefix of the channel and exposes the channel
+    properties of the power supply, so that channels can be used from a loop: for chan in ps.channels.
+    """
+    __slots__ = ('_psu', 'number', 'prefix')
+
+    def __init__(self, psu, number):
+        self._psu = psu
+        self.number = number
+        self.prefix = 'CH' + str(number)
+
+    @property
+    def state(self):
+        return self._psu.get_channel_state(self.number)
+
+    @state.setter
+    def state(self, state):
+        self._psu.set_channel_state(self.number, state)
+
+    @property
+    def set_voltage(self):
+        return self._psu.get_setpoint_voltage(self.number)
+
+    @set_voltage.setter
+    def set_voltage(self, volts):
+        self._psu.set_voltage(self.number, volts)
+
+    @property
+    def actual_voltage(self):
+        return self._psu.get_actual_voltage(self.number)
+
+    @property
+    def set_current(self):
+        return self._psu.get_setpoint_current(self.number)
+
+    @set_current.setter
+    def set_current(self, amps):
+        self._psu.set_current(self.number, amps)
+
+    @property
+    def actual_current(self):
+        return self._psu.get_actual_current(self.number)
+
+    @property
+    def voltage_limit(self):
+        return self._psu.get_voltage_limit(self.number)
+
+    @voltage_limit.setter
+    def voltage_limit(self, volts):
+        self._psu.set_voltage_limit(self.number, volts)
+
+    @property
+    def current_limit(self):
+        return self._psu.get_current_limit(self.number)
+
+    @current_limit.setter
+    def current_limit(self, amps):
+        self._psu.set_current_limit(self.number, amps)
+
+
 class Spd3303x(SocketEthernetDevice, PowerSupply):
     """
     An ethernet-controlled power supply. Querys and commands based on manual for Siglent SPD3303X power supply.
     All voltages and currents are in Volts and Amps unless specified otherwise.
     """
+    __slots__ = PowerSupply.POWER_SUPPLY_ATTRS + ('_status_cache', '_status_cache_ttl', 'channels')
 
     def __init__(
             self,
@@ -316,7 +543,8 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         SocketEthernetDevice.__init__(
             self,
             ip4_address=ip4_address,
-            port=port
+            port=port,
+            min_interval=0.1,  # commands are not terminated, so the supply needs a gap between them
         )
         PowerSupply.__init__(
             self,
@@ -328,6 +556,10 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
             zero_on_startup=zero_on_startup,
         )
 
+        self.channels = tuple(_Spd3303xChannel(self, n) for n in range(1, self._number_of_channels + 1))
+        self._status_cache = (0, None)  # (time.monotonic() of the query, status code)
+        self._status_cache_ttl = 0.05  # seconds a system status reply is reused for
+
         if self._zero_on_startup:
             self.zero_all_channels()
 
@@ -342,7 +574,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         str
             Decode the response in bytes using utf-8
         """
-        return self._query(qry.encode('utf-8')).decode('utf-8').strip()
+        return self._query(_encode_scpi(qry)).decode('utf-8').strip()
     
     def _command_(self, cmd):
         """
@@ -355,10 +587,323 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         Nonetype
             returns None if command is sent succesfully.
         """
-        return self._command(cmd.encode('utf-8'))
+        return self._command(_encode_scpi(cmd))
+
+    async def _aquery_(self, qry):
+        """
+        Coroutine version of _query_(). Needs aconnect() first.
+        """
+        reply = await self._aquery(_encode_scpi(qry))
+        if type(reply) is str:
+            return reply
+
+        return reply.decode('utf-8').strip()
+
+    async def _acommand_(self, cmd):
+        """
+        Coroutine version of _command_(). Needs aconnect() first.
+        """
+        return await self._acommand(_encode_scpi(cmd))
+
+    def _query_multi_(self, qrys):
+        """
+        Send several queries chained with ';' in a single message and split the reply.
+
+        Parameters
+        ----------
+        qrys : list of str
+            The queries to chain. Check manual for valid queries.
+
+        Returns
+        -------
+        list of str
+            If succesful, one reply per query, in the same order as qrys.
+        str
+            Else, return error string
+        """
+        reply = self._query_(';'.join(qrys))
+        replies = [r.strip() for r in reply.split(';')]
+        if len(replies) != len(qrys):
+            return 'ERROR: expected ' + str(len(qrys)) + ' replies, got: ' + reply
+
+        return replies
 
     # Methods
     # -------
+    def get_all_actual_measurements(self):
+        """
+        Read the actual voltage and current of every channel in a single round-trip.
+
+        Returns
+        -------
+        list of float
+            If succesful, [ch1 voltage, ch1 current, ch2 voltage, ch2 current, ...] in Volts and Amps.
+        str
+            Else, return error string
+        """
+        qrys = []
+        for chan in self.channels:
+            qrys.append('measure:voltage? ' + chan.prefix)
+            qrys.append('measure:current? ' + chan.prefix)
+
+        replies = self._query_multi_(qrys)
+        if type(replies) is str:
+            return replies
+
+        return [float(r) for r in replies]
+
+    async def aget_all_actual_measurements(self):
+        """
+        Coroutine version of get_all_actual_measurements(). Needs aconnect() first.
+
+        Returns
+        -------
+        list of float
+            If succesful, [ch1 voltage, ch1 current, ch2 voltage, ch2 current, ...] in Volts and Amps.
+        str
+            Else, return error string
+        """
+        qrys = []
+        for chan in self.channels:
+            qrys.append('measure:voltage? ' + chan.prefix)
+            qrys.append('measure:current? ' + chan.prefix)
+
+        reply = await self._aquery_(';'.join(qrys))
+        replies = reply.split(';')
+        if len(replies) != len(qrys):
+            return 'ERROR: expected ' + str(len(qrys)) + ' replies, got: ' + reply
+
+        return [float(r) for r in replies]
+
+    def _get_setpoints_(self):
+        """
+        Read the setpoint voltage and current of every channel with one chained query.
+
+        Returns
+        -------
+        list of float
+            If succesful, [ch1 voltage, ch1 current, ch2 voltage, ch2 current, ...] in Volts and Amps.
+        str
+            Else, return error string
+        """
+        qrys = []
+        for chan in self.channels:
+            qrys.append(chan.prefix + ':voltage?')
+            qrys.append(chan.prefix + ':current?')
+
+        replies = self._query_multi_(qrys)
+        if type(replies) is str:
+            return replies
+
+        try:
+            return [float(r) for r in replies]
+        except ValueError:
+            return 'ERROR: could not parse setpoints: ' + str(replies)
+
+    def zero_all_channels(self):
+        """
+        Sets the set voltage and set current of all channels to 0 and turns them off. The setpoints and the system
+        status are read first, so that commands are only sent for channels that are not already zeroed.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        setpoints = self._get_setpoints_()
+        status = self._get_system_status_code()
+        if type(setpoints) is str or type(status) is str:
+            return PowerSupply.zero_all_channels(self)
+
+        channels = range(1, self._number_of_channels + 1)
+        volt_chans = [chan for chan in channels if setpoints[2*chan - 2] != 0]
+        amp_chans = [chan for chan in channels if setpoints[2*chan - 1] != 0]
+        on_chans = [chan for chan in channels if status >> (3 + chan) & 1]
+
+        err1 = self.set_voltage_multi(volt_chans, [0] * len(volt_chans))
+        if err1 is not None:
+            return err1
+        err2 = self.set_current_multi(amp_chans, [0] * len(amp_chans))
+        if err2 is not None:
+            return err2
+        err3 = self.set_channel_state_multi(on_chans, [False] * len(on_chans))
+        if err3 is not None:
+            return err3
+        for chan in channels:
+            print('Channel', chan, 'zeroed.')
+
+    def set_voltage_multi(self, channels, volts_list):
+        """
+        Set the setpoint voltage of several channels with a single message. Nothing is sent if any of the values is
+        not valid.
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        volts_list : iterable of float
+            new setpoint voltage of each channel in Volts.
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, return error string
+        """
+        cmds = []
+        for channel, volts in zip(channels, volts_list):
+            err = self.check_valid_channel(channel)
+            if err is not None:
+                return err
+            if volts > self._channel_voltage_limits[channel - 1]:
+                return 'ERROR: CH' + str(channel) + ' voltage not set. New voltage is higher than limit'
+            cmds.append(self.channels[channel - 1].prefix + ':voltage ' + str(round(volts, 3)))
+
+        if cmds:
+            return self._command_(';'.join(cmds))
+
+    def set_current_multi(self, channels, amps_list):
+        """
+        Set the setpoint current of several channels with a single message. Nothing is sent if any of the values is
+        not valid.
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        amps_list : iterable of float
+            new setpoint current of each channel in Amps.
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, return error string
+        """
+        cmds = []
+        for channel, amps in zip(channels, amps_list):
+            err = self.check_valid_channel(channel)
+            if err is not None:
+                return err
+            if amps > self._channel_current_limits[channel - 1]:
+                return 'ERROR: CH' + str(channel) + ' current not set. New current is higher than limit'
+            cmds.append(self.channels[channel - 1].prefix + ':current ' + str(round(amps, 3)))
+
+        if cmds:
+            return self._command_(';'.join(cmds))
+
+    def set_channel_state_multi(self, channels, states):
+        """
+        Set the state of several channels with a single message. Nothing is sent if any of the values is not valid.
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        states : iterable of bool, int
+            True or 1 for ON, False or 0 for OFF
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, return error string
+        """
+        cmds = []
+        for channel, state in zip(channels, states):
+            err = self.check_valid_channel(channel)
+            if err is not None:
+                return err
+            if type(state) is not bool and type(state) is not int:
+                return 'ERROR: type ' + str(type(state)) + ' not supported. Input True or 1 for ON, or False or 0 for OFF'
+            if state:
+                state_str = 'ON'
+            else:
+                state_str = 'OFF'
+            cmds.append('Output ' + self.channels[channel - 1].prefix + ',' + state_str)
+
+        if cmds:
+            self._status_cache = (0, None)
+            return self._command_(';'.join(cmds))
+
+    def set_voltage_limit_multi(self, channels, volts_list):
+        """
+        Set the software voltage limit of several channels. The setpoints of all the channels are read with a single
+        query. No limit is changed if any of the values is not valid.
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        volts_list : iterable of float
+            new voltage limit of each channel.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        pairs = list(zip(channels, volts_list))
+        for channel, volts in pairs:
+            err = self.check_valid_channel(channel)
+            if err is not None:
+                return err
+            if volts > self._MAX_voltage or volts <= 0:
+                return 'Voltage limit not set. New voltage limit is not allowed by the power supply.'
+
+        setpoints = self._get_setpoints_()
+        if type(setpoints) is str:
+            return setpoints
+
+        for channel, volts in pairs:
+            if volts < setpoints[2*channel - 2]:
+                return 'Voltage limit not set. New voltage limit is lower than present channel setpoint voltage.'
+        for channel, volts in pairs:
+            self._channel_voltage_limits[channel - 1] = volts
+
+    def set_current_limit_multi(self, channels, amps_list):
+        """
+        Set the software current limit of several channels. See set_voltage_limit_multi().
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        amps_list : iterable of float
+            new current limit of each channel.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        pairs = list(zip(channels, amps_list))
+        for channel, amps in pairs:
+            err = self.check_valid_channel(channel)
+            if err is not None:
+                return err
+            if amps > self._MAX_current or amps <= 0:
+                return 'Current limit not set. New current limit is not allowed by the power supply.'
+
+        setpoints = self._get_setpoints_()
+        if type(setpoints) is str:
+            return setpoints
+
+        for channel, amps in pairs:
+            if amps < setpoints[2*channel - 1]:
+                return 'Current limit not set. New current limit is lower than present channel setpoint current.'
+        for channel, amps in pairs:
+            self._channel_current_limits[channel - 1] = amps
+
     def get_channel_state(self, channel):
         """
         The 5th digit from right to left of the binary output from the system status query gives the state of channel 1,
@@ -380,11 +925,11 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         if err is not None:
             return err
 
-        out = self.system_status[-4-channel]
-        try:
-            return bool(int(out))
-        except ValueError:
-            return out
+        status = self._get_system_status_code()
+        if type(status) is str:
+            return status
+
+        return bool(status >> (3 + channel) & 1)
 
     def set_channel_state(self, channel, state):
         """
@@ -415,7 +960,8 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         else:
             state_str = 'OFF'
 
-        cmd = 'Output CH' + str(channel) + ',' + state_str
+        cmd = 'Output ' + self.channels[channel - 1].prefix + ',' + state_str
+        self._status_cache = (0, None)
         self._command_(cmd)
 
     def get_setpoint_voltage(self, channel):
@@ -436,7 +982,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         if err is not None:
             return err
 
-        qry = 'CH' + str(channel) + ':voltage?'
+        qry = self.channels[channel - 1].prefix + ':voltage?'
         return float(self._query_(qry))
 
     def set_voltage(self, channel, volts):
@@ -463,7 +1009,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
             return 'ERROR: CH' + str(channel) + ' voltage not set. New voltage is higher than limit'
 
         volts = round(volts, 3)
-        chan = 'CH' + str(channel)
+        chan = self.channels[channel - 1].prefix
         cmd = chan + ':voltage ' + str(volts)
         self._command_(cmd)
 
@@ -485,7 +1031,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         if err is not None:
             return err
 
-        qry = 'measure:voltage? ' + 'CH' + str(channel)
+        qry = 'measure:voltage? ' + self.channels[channel - 1].prefix
         return float(self._query_(qry))
 
     def get_setpoint_current(self, channel):
@@ -506,7 +1052,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         if err is not None:
             return err
 
-        qry = 'CH' + str(channel) + ':current?'
+        qry = self.channels[channel - 1].prefix + ':current?'
         return float(self._query_(qry))
 
     def set_current(self, channel, amps):
@@ -533,7 +1079,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
             return 'ERROR: CH' + str(channel) + ' current not set. New current is higher than limit'
 
         amps = round(amps, 3)
-        chan = 'CH' + str(channel)
+        chan = self.channels[channel - 1].prefix
         cmd = chan + ':current ' + str(amps)
         self._command_(cmd)
 
@@ -555,7 +1101,7 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         if err is not None:
             return err
 
-        qry = 'measure:current? ' + 'CH' + str(channel)
+        qry = 'measure:current? ' + self.channels[channel - 1].prefix
         return float(self._query_(qry))
 
     # Properties
@@ -570,6 +1116,36 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         qry = 'IP?'
         return self._query_(qry)
 
+    def _get_system_status_code(self):
+        """
+        Query the power supply for its status as an int. Each bit represents a state for some physical attribute of the
+        power supply. Refer to the manual for the meaning of each bit.
+
+        The status is reused for _status_cache_ttl seconds, so that reading the state of both channels in a row only
+        queries the power supply once. Changing the state of a channel discards the stored status.
+
+        Returns
+        -------
+        int
+            If succesful.
+        str
+            Else, return error string
+        """
+        t, status = self._status_cache
+        now = time.monotonic()
+        if status is not None and now - t < self._status_cache_ttl:
+            return status
+
+        qry = 'system:status?'
+        reply_hex_str = self._query_(qry)  # hex number represented in bytes
+        try:
+            status = int(reply_hex_str, 16)
+        except ValueError:
+            return 'ERROR: could not read system status: ' + reply_hex_str
+
+        self._status_cache = (now, status)
+        return status
+
     @property
     def system_status(self):
         """
@@ -582,10 +1158,11 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
         str
             10-digit binary number as a string representing the status of the system
         """
-        qry = 'system:status?'
-        reply_hex_str = self._query_(qry)  # hex number represented in bytes
-        reply_bin_str = f'{int(reply_hex_str, 16):0>10b}'  # 10 digit binary num, padded with 0, as string
-        return reply_bin_str
+        status = self._get_system_status_code()
+        if type(status) is str:
+            return status
+
+        return f'{status:0>10b}'  # 10 digit binary num, padded with 0, as string
 
     @property
     def ch1_state(self):
@@ -663,40 +1240,15 @@ class Spd3303x(SocketEthernetDevice, PowerSupply):
     def ch2_actual_current(self):
         return self.get_actual_current(2)
 
-    @property
-    def ch1_voltage_limit(self):
-        return self._channel_voltage_limits[0]
-
-    @ch1_voltage_limit.setter
-    def ch1_voltage_limit(self, volts):
-        self.set_voltage_limit(1, volts)
-
-    @property
-    def ch1_current_limit(self):
-        return self._channel_current_limits[0]
-
-    @ch1_current_limit.setter
-    def ch1_current_limit(self, amps):
-        self.set_current_limit(1, amps)
-
-    @property
-    def ch2_voltage_limit(self):
-        return self._channel_voltage_limits[1]
-
-    @ch2_voltage_limit.setter
-    def ch2_voltage_limit(self, volts):
-        self.set_voltage_limit(2, volts)
-
-    @property
-    def ch2_current_limit(self):
-        return self._channel_current_limits[1]
-
-    @ch2_current_limit.setter
-    def ch2_current_limit(self, amps):
-        self.set_current_limit(2, amps)
+    ch1_voltage_limit = _ChannelLimit()
+    ch1_current_limit = _ChannelLimit()
+    ch2_voltage_limit = _ChannelLimit()
+    ch2_current_limit = _ChannelLimit()
 
 
 class Mr50040(SocketEthernetDevice, PowerSupply):
+    __slots__ = PowerSupply.POWER_SUPPLY_ATTRS
+
     def __init__(
             self,
             ip4_address=None,
@@ -1134,6 +1686,8 @@ class Mr50040(SocketEthernetDevice, PowerSupply):
 # ======================================================================================================================
 if platform == 'win32':
     class WebTc(MccDeviceWindows):
+        __slots__ = ()
+
         def __init__(self, board_number, ip4_address=None, port=54211, default_units='celsius'):
             """
             Class for a Web_Tc device from MCC. Might make a master class for temperature daq
@@ -1167,6 +1721,8 @@ if platform == 'win32':
 
     class ETcWindows(MccDeviceWindows):
         # TODO: check if the io methods can be moved to the super class MccDeviceWindows
+        __slots__ = ()
+
         def __init__(self, board_number, ip4_address=None, port=54211, default_units='celsius'):
             """
             Class for a Web_Tc device from MCC. Might make a master class for temperature daq
@@ -1245,6 +1801,8 @@ if platform == 'win32':
 
 if platform == 'linux' or platform == 'linux2':
     class ETcLinux(MccDeviceLinux):
+        __slots__ = ()
+
         def __init__(self, ip4_address, port=54211, default_units='celsius'):
             super().__init__(ip4_address, port, default_units)
 
@@ -1664,6 +2222,7 @@ class Srs100:
         self._filament_state = False
         self._cdem_state = False
         self._noise_floor = 0
+        self._idn = None  # read once, see idn
 
         self.initialize()
 
@@ -1733,10 +2292,23 @@ class Srs100:
     # General
     # -------
     def initialize(self):
+        """
+        Handshake with the RGA: flush the communication buffers, then read and store the identification string and
+        the noise floor. After this, idn does not query the RGA again.
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, return error string
+        """
+        print('Flushing communication buffers')
+        err = self.flush_buffers()
+        self._idn = None
         print(self.idn)
         self._noise_floor = self.get_detector_scan_speed()
-        print('Flushing communication buffers')
-        return self.flush_buffers()
+        return err
 
     def flush_buffers(self):
         return self._command_('IN0')
@@ -2167,6 +2739,31 @@ class Srs100:
         except ValueError:
             return out
 
+    def _read_scan_(self, n_points):
+        """
+        Receive the data points of a scan into a single preallocated buffer, and convert them all at once.
+
+        Parameters
+        ----------
+        n_points : int
+            number of 4-byte data points sent by the RGA.
+
+        Returns
+        -------
+        np.array
+            1D array containing the raw ion currents, in units of 0.1 femtoAmps.
+        str
+            If a data point is not received before the read timeout, return error string
+        """
+        buf = bytearray(4 * n_points)
+        for i in range(n_points):
+            raw = self._serial_port.read(4)  # receive each data point individually.
+            if len(raw) != 4:
+                return 'ERROR: scan stopped after ' + str(i) + ' of ' + str(n_points) + ' data points.'
+            buf[4*i:4*i + 4] = raw
+
+        return np.frombuffer(buf, dtype='<i4').astype(np.float64)  # 4-byte signed little-endian ints
+
     def get_analog_scan(self, m_lo=1, m_hi=65, points_per_amu=10, speed=3):
         """
         start an analog scan across an initial to a final mass. Raw output from RGA comes as four-byte signed
@@ -2209,11 +2806,9 @@ class Srs100:
 
         self._serial_port.write('SC1\r'.encode('utf-8'))
         time.sleep(0.3)
-        out = np.asarray([])
-        for i in range(n_points):
-            raw = self._serial_port.read(4)
-            int_10 = self._translate_to_decimal(raw)
-            out = np.append(out, int_10)
+        out = self._read_scan_(n_points)
+        if type(out) is str:
+            return out
 
         return out*(1e-13)/self.get_partial_sensitivity_factor()  # convert raw units to Torr
 
@@ -2253,11 +2848,9 @@ class Srs100:
 
         self._serial_port.write('HS1\r'.encode('utf-8'))
         time.sleep(0.3)
-        out = np.asarray([])
-        for i in range(n_points):
-            raw = self._serial_port.read(4)  # receive each data point individually.
-            int_10 = self._translate_to_decimal(raw)
-            out = np.append(out, int_10)
+        out = self._read_scan_(n_points)
+        if type(out) is str:
+            return out
 
         return out*(1e-13)/self.get_partial_sensitivity_factor()  # convert raw units to Torr
 
@@ -2289,7 +2882,12 @@ class Srs100:
 
     @property
     def idn(self):
-        return self._query_('ID?')
+        if self._idn is None:
+            idn = self._query_('ID?')
+            if not idn:  # no response, try again next time
+                return idn
+            self._idn = idn
+        return self._idn
 
     @property
     def status_byte(self):
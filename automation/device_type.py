@@ -4,6 +4,16 @@ Created on Thursday, April 7, 2022
 """
 
 
+import functools
+import logging
+import os
+import re
+import queue
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from sys import platform
 
 try:
@@ -24,8 +34,49 @@ except ModuleNotFoundError:
 # TODO: Add proper error handling. This includes receiving error from power supply.
 # TODO: Finish adding comments
 
+class _RateLimitFilter(logging.Filter):
+    """
+    Drop a log record if the same message, with the same arguments, was let through less than interval seconds ago.
+    Keeps a failing channel polled in a fast loop from flooding the handlers.
+    """
+    def __init__(self, interval=1.0):
+        super().__init__()
+        self._interval = interval
+        self._last_seen = {}
+
+    def filter(self, record):
+        key = (record.msg, record.args)
+        now = time.monotonic()
+        last = self._last_seen.get(key)
+        if last is not None and now - last < self._interval:
+            return False
+        if len(self._last_seen) > 256:  # do not grow forever with messages that are never repeated
+            self._last_seen.clear()
+        self._last_seen[key] = now
+        return True
+
+
+_log = logging.getLogger(__name__)  # silent by default. Use logging.basicConfig() or add a handler to see messages
+_log.addHandler(logging.NullHandler())
+_log.addFilter(_RateLimitFilter())
+_TC_INT_TO_STR = ('', 'J', 'K', 'T', 'E', 'R', 'S', 'B', 'N')  # index is the code used by the MCC libraries
+_TC_STR_TO_INT = {tc: i for i, tc in enumerate(_TC_INT_TO_STR) if tc}
+_CHANNEL_ATTR = re.compile(r'(temp_ch|thermocouple_type_ch)(\d+)')  # temp_ch0, thermocouple_type_ch3, etc.
+
 
 class PowerSupply:
+    # Power supplies are combined with the slotted SocketEthernetDevice, and two bases with non-empty __slots__ cannot
+    # be combined. So PowerSupply declares no slots itself, and each subclass lists POWER_SUPPLY_ATTRS in its own.
+    __slots__ = ()
+    POWER_SUPPLY_ATTRS = (
+        '_MAX_voltage',
+        '_MAX_current',
+        '_channel_voltage_limits',
+        '_channel_current_limits',
+        '_number_of_channels',
+        '_zero_on_startup',
+    )
+
     def __init__(
             self,
             MAX_voltage,
@@ -61,24 +112,25 @@ class PowerSupply:
 
         self._MAX_voltage = MAX_voltage
         self._MAX_current = MAX_current
-        self._channel_voltage_limits = channel_voltage_limits
-        self._channel_current_limits = channel_current_limits
         self._number_of_channels = number_of_channels
         self._zero_on_startup = zero_on_startup
 
-        if self._channel_voltage_limits is None and self._MAX_voltage is not None:
-            self._channel_voltage_limits = [self._MAX_voltage] * self._number_of_channels
-        if self._channel_current_limits is None and self._MAX_current is not None:
-            self._channel_current_limits = [self._MAX_current] * self._number_of_channels
+        # limits are stored as float arrays, one item per channel, so that all channels can be checked at once.
+        if channel_voltage_limits is None and MAX_voltage is not None:
+            channel_voltage_limits = [MAX_voltage] * number_of_channels
+        if channel_current_limits is None and MAX_current is not None:
+            channel_current_limits = [MAX_current] * number_of_channels
+        self._channel_voltage_limits = None if channel_voltage_limits is None else np.array(channel_voltage_limits,
+                                                                                             dtype=np.float64)
+        self._channel_current_limits = None if channel_current_limits is None else np.array(channel_current_limits,
+                                                                                             dtype=np.float64)
 
     def check_valid_channel(self, channel):
-        if type(channel) != int:
-            return 'ERROR: channel should be an int, starting from 1.', type(channel), 'not supported'
-        elif channel > self.number_of_channels:
-            return 'ERROR: channel' + str(channel) + 'not found. This power supply has' + str(self.number_of_channels)\
-                   + 'channels. '
-        else:
-            return None
+        if type(channel) is not int:
+            return 'ERROR: channel should be an int, starting from 1. ' + str(type(channel)) + ' not supported'
+        if not 1 <= channel <= self._number_of_channels:
+            return 'ERROR: channel ' + str(channel) + ' not found. This power supply has ' \
+                   + str(self._number_of_channels) + ' channels, starting from channel 1.'
 
     def get_channel_state(self, channel):
         """
@@ -249,7 +301,7 @@ class PowerSupply:
         if err is not None:
             return err
 
-        return self._channel_voltage_limits[channel - 1]
+        return float(self._channel_voltage_limits[channel - 1])
 
     def set_voltage_limit(self, channel, volts):
         """
@@ -302,7 +354,7 @@ class PowerSupply:
         if err is not None:
             return err
 
-        return self._channel_current_limits[channel - 1]
+        return float(self._channel_current_limits[channel - 1])
 
     def set_current_limit(self, channel, amps):
         """
@@ -352,10 +404,8 @@ class PowerSupply:
         str
             Else, return an error string.
         """
-        for chan in range(1, self.number_of_channels+1):
-            err = self.set_voltage_limit(chan, volts)
-            if err is not None:
-                return err
+        n = self._number_of_channels
+        return self.set_voltage_limit_multi(range(1, n + 1), [volts] * n)
 
     def set_all_channels_current_limit(self, amps):
         """
@@ -375,11 +425,155 @@ class PowerSupply:
         str
             Else, return an error string.
         """
-        for chan in range(1, self.number_of_channels+1):
+        n = self._number_of_channels
+        return self.set_current_limit_multi(range(1, n + 1), [amps] * n)
+
+    def set_voltage_multi(self, channels, volts_list):
+        """
+        Set the setpoint voltage of several channels. This default sends one command per channel. Power supplies that
+        accept several settings in a single message should override it.
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        volts_list : iterable of float
+            new setpoint voltage of each channel in Volts.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        for chan, volts in zip(channels, volts_list):
+            err = self.set_voltage(channel=chan, volts=volts)
+            if err is not None:
+                return err
+
+    def set_current_multi(self, channels, amps_list):
+        """
+        Set the setpoint current of several channels. See set_voltage_multi().
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        amps_list : iterable of float
+            new setpoint current of each channel in Amps.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        for chan, amps in zip(channels, amps_list):
+            err = self.set_current(channel=chan, amps=amps)
+            if err is not None:
+                return err
+
+    def set_channel_state_multi(self, channels, states):
+        """
+        Set the state of several channels. See set_voltage_multi().
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        states : iterable of bool
+            True for ON, False for OFF.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        for chan, state in zip(channels, states):
+            err = self.set_channel_state(channel=chan, state=state)
+            if err is not None:
+                return err
+
+    def set_voltage_limit_multi(self, channels, volts_list):
+        """
+        Set the voltage limit of several channels. This default calls set_voltage_limit() for each channel. Power
+        supplies that can read all the setpoints in a single query should override it.
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        volts_list : iterable of float
+            new voltage limit of each channel.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        for chan, volts in zip(channels, volts_list):
+            err = self.set_voltage_limit(chan, volts)
+            if err is not None:
+                return err
+
+    def set_current_limit_multi(self, channels, amps_list):
+        """
+        Set the current limit of several channels. See set_voltage_limit_multi().
+
+        Parameters
+        ----------
+        channels : iterable of int
+            channels to set. Numbers are from 1 up to the number of channels of the power supply.
+        amps_list : iterable of float
+            new current limit of each channel.
+
+        Returns
+        -------
+        None
+            If succesful, returns None.
+        str
+            Else, return an error string.
+        """
+        for chan, amps in zip(channels, amps_list):
             err = self.set_current_limit(chan, amps)
             if err is not None:
                 return err
 
+    def check_all_limits(self, volts_list=None, amps_list=None):
+        """
+        Compare one setpoint per channel against the software limits of all the channels at once.
+
+        Parameters
+        ----------
+        volts_list : list of float, numpy.ndarray, None
+            setpoint voltage of each channel, starting from channel 1. Not checked if None.
+        amps_list : list of float, numpy.ndarray, None
+            setpoint current of each channel, starting from channel 1. Not checked if None.
+
+        Returns
+        -------
+        None
+            If all the setpoints are within the limits.
+        str
+            Else, return an error string naming the first channel over its limit.
+        """
+        for values, limits, quantity in ((volts_list, self._channel_voltage_limits, 'voltage'),
+                                         (amps_list, self._channel_current_limits, 'current')):
+            if values is None:
+                continue
+            values = np.asarray(values, dtype=np.float64)
+            if values.shape != limits.shape:
+                return 'ERROR: expected ' + str(len(limits)) + ' ' + quantity + ' values, got ' + str(values.size)
+            over = np.flatnonzero(values > limits)
+            if over.size:
+                return 'ERROR: CH' + str(over[0] + 1) + ' ' + quantity + ' is higher than limit'
+
     def zero_all_channels(self):
         """
         Sets the set voltage and set current of all channels to 0.
@@ -391,16 +585,18 @@ class PowerSupply:
         str
             Else, return an error string.
         """
-        for chan in range(1, self.number_of_channels+1):
-            err1 = self.set_voltage(channel=chan, volts=0)
-            if err1 is not None:
-                return err1
-            err2 = self.set_current(channel=chan, amps=0)
-            if err2 is not None:
-                return err2
-            err3 = self.set_channel_state(channel=chan, state=False)
-            if err3 is not None:
-                return err3
+        n = self._number_of_channels
+        channels = range(1, n + 1)
+        err1 = self.set_voltage_multi(channels, [0] * n)
+        if err1 is not None:
+            return err1
+        err2 = self.set_current_multi(channels, [0] * n)
+        if err2 is not None:
+            return err2
+        err3 = self.set_channel_state_multi(channels, [False] * n)
+        if err3 is not None:
+            return err3
+        for chan in channels:
             print('Channel', chan, 'zeroed.')
 
     # Properties
@@ -421,37 +617,29 @@ class PowerSupply:
     def MAX_voltage(self):
         return self._MAX_voltage
 
-    # @MAX_voltage_limit.setter
-    # def MAX_voltage_limit(self, new_MAX_voltage):
+    # @MAX_voltage.setter
+    # def MAX_voltage(self, new_MAX_voltage):
     #     print('CAUTION: The MAX voltage limit should always match the hardware limitation of the power supply.')
     #     print('Setting MAX voltage limit to', new_MAX_voltage)
-    #     self._MAX_voltage_limit = new_MAX_voltage
+    #     self._MAX_voltage = new_MAX_voltage
 
     @property
     def MAX_current(self):
         return self._MAX_current
 
-    # @MAX_current_limit.setter
-    # def MAX_current_limit(self, new_MAX_current):
+    # @MAX_current.setter
+    # def MAX_current(self, new_MAX_current):
     #     print('CAUTION: The MAX current limit should always match the hardware limitation of the power supply.')
-    #     print('Setting MAX voltage limit to', new_MAX_current)
-    #     self._MAX_voltage_limit = new_MAX_current
+    #     print('Setting MAX current limit to', new_MAX_current)
+    #     self._MAX_current = new_MAX_current
 
     @property
     def channel_voltage_limits(self):
-        out = ''
-        for i, lim in enumerate(self._channel_voltage_limits):
-            out += 'chan' + str(i+1) + ': ' + str(lim) + '\n'
-
-        return out
+        return ''.join(f'chan{i + 1}: {lim}\n' for i, lim in enumerate(self._channel_voltage_limits.tolist()))
 
     @property
     def channel_current_limits(self):
-        out = ''
-        for i, lim in enumerate(self._channel_current_limits):
-            out += 'chan' + str(i + 1) + ': ' + str(lim) + '\n'
-
-        return out
+        return ''.join(f'chan{i + 1}: {lim}\n' for i, lim in enumerate(self._channel_current_limits.tolist()))
 
     @property
     def number_of_channels(self):
@@ -465,8 +653,336 @@ class PowerSupply:
 
 
 # ======================================================================================================================
+def _convert_from_celsius(celsius, units):
+    """
+    Convert readings in Celsius to other temperature units with numpy, all channels at once.
+
+    Parameters
+    ----------
+    celsius : float, numpy.ndarray
+        readings in Celsius.
+    units : str
+        the target units. Not case-sensitive.
+
+    Returns
+    -------
+    float, numpy.ndarray
+        If units is Celsius, Fahrenheit or Kelvin. Else, return None, since voltages cannot be obtained from a
+        temperature.
+    """
+    units = units.lower()
+    if units in ('c', 'celsius'):
+        return celsius
+    elif units in ('f', 'fahrenheit'):
+        return np.multiply(celsius, 1.8) + 32
+    elif units in ('k', 'kelvin'):
+        return np.add(celsius, 273.15)
+    return None
+
+
+def _readings_to_array(readings):
+    """
+    Convert a list of readings to a numpy float32 array, with nan in place of None.
+    """
+    return np.array([np.nan if v is None else v for v in readings], dtype=np.float32)
+
+
+class _ChannelProxy:
+    __slots__ = ('_count', '_get', '_set', '_get_range')
+
+    def __init__(self, count, get, set=None, get_range=None):
+        """
+        Indexable view of one per-channel quantity of a DAQ, so that daq.temp[3] reads channel 3 and daq.temp[:] reads
+        all the channels with a single scan.
+
+        Parameters
+        ----------
+        count : callable
+            returns the number of channels.
+        get : callable
+            get(channel) returns the value of one channel.
+        set : callable, None
+            set(channel, value) sets the value of one channel. None if the quantity is read-only.
+        get_range : callable, None
+            get_range(low_channel, high_channel) returns the values of a range of channels, inclusive, in one call.
+            If None, each channel of a slice is read with get().
+        """
+        self._count = count
+        self._get = get
+        self._set = set
+        self._get_range = get_range
+
+    def __len__(self):
+        return self._count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            channels = range(*key.indices(self._count()))
+            if not channels:
+                return []
+            if self._get_range is not None and channels.step == 1:
+                return self._get_range(channels[0], channels[-1])
+            return [self._get(channel) for channel in channels]
+
+        if type(key) is int and key < 0:
+            key += self._count()
+        return self._get(key)
+
+    def __setitem__(self, key, value):
+        if self._set is None:
+            raise TypeError('channel values are read-only')
+        if type(key) is int and key < 0:
+            key += self._count()
+        err = self._set(key, value)
+        if err is not None:
+            print(err)
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class AsyncScanner:
+    __slots__ = ('_read', '_period', '_latest', '_lock', '_queue', '_stop', '_thread', '_cpu')
+
+    def __init__(self, read, period, queue_size=0, cpu=None):
+        """
+        Calls read() every period seconds from a daemon thread, so that the caller never waits for the device. The
+        last result is kept for latest(), and every result can also be delivered through a queue.
+
+        Parameters
+        ----------
+        read : callable
+            takes no arguments and returns one scan, or None if the scan failed.
+        period : float
+            time in seconds between the start of two consecutive scans.
+        queue_size : int
+            If more than 0, every scan is also put in a queue.Queue of this size, see the queue property. When the
+            queue is full, the oldest scan is dropped.
+        cpu : int, None
+            If given, the thread is pinned to this CPU core. Only supported on Linux, ignored with a warning elsewhere.
+        """
+        self._read = read
+        self._period = period
+        self._latest = deque(maxlen=1)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(queue_size) if queue_size > 0 else None
+        self._stop = threading.Event()
+        self._thread = None
+        self._cpu = cpu
+
+    def start(self):
+        if self._thread is not None:
+            return 'ERROR: scanner is already running.'
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def latest(self):
+        """
+        Returns
+        -------
+        object
+            the result of the last scan that did not fail, or None if there is none yet.
+        """
+        with self._lock:
+            return self._latest[0] if self._latest else None
+
+    @property
+    def queue(self):
+        return self._queue
+
+    @property
+    def is_running(self):
+        return self._thread is not None
+
+    def _run(self):
+        if self._cpu is not None:
+            try:
+                os.sched_setaffinity(0, {self._cpu})  # 0 is the calling thread
+            except (AttributeError, OSError) as err:
+                _log.warning('Could not pin background scan to cpu %s: %s', self._cpu, err)
+
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                result = self._read()
+            except Exception as err:  # keep scanning through errors, the device may come back
+                _log.warning('Background scan failed: %s', err)
+                result = None
+
+            if result is not None:
+                with self._lock:
+                    self._latest.append(result)
+                if self._queue is not None:
+                    try:
+                        self._queue.put_nowait(result)
+                    except queue.Full:
+                        try:
+                            self._queue.get_nowait()
+                        except queue.Empty:
+                            pass
+                        self._queue.put_nowait(result)
+
+            deadline += self._period
+            self._stop.wait(max(0, deadline - time.monotonic()))
+
+
+class MccDeviceGroup:
+    __slots__ = ('_devices',)
+
+    def __init__(self, devices):
+        """
+        Polls several MCC boards at the same time, each one from its own background scan thread. On Linux, the threads
+        are spread over the CPU cores available to the process, so that the boards are not all serviced by one core.
+
+        Parameters
+        ----------
+        devices : iterable of MccDeviceWindows or MccDeviceLinux
+            connected devices, each one with its own ip4_address and port.
+        """
+        self._devices = tuple(devices)
+
+    def start(self, rate_hz=10, queue_size=0, pin_cpus=True):
+        """
+        Start the background scan of every device. See start_background_scan() of the device classes.
+
+        Parameters
+        ----------
+        rate_hz : float
+            number of scans per second, for every device.
+        queue_size : int
+            scan_queue size of every device.
+        pin_cpus : bool
+            If True and the platform supports it, pin the thread of each device to a different CPU core, wrapping
+            around when there are more devices than cores.
+
+        Returns
+        -------
+        None
+            If succesful, return None
+        str
+            Else, stop the devices started so far and return the error string
+        """
+        cpus = (None,)
+        if pin_cpus and hasattr(os, 'sched_getaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+
+        for i, dev in enumerate(self._devices):
+            err = dev.start_background_scan(rate_hz, queue_size, cpu=cpus[i % len(cpus)])
+            if err is not None:
+                for started in self._devices[:i]:
+                    started.stop_background_scan()
+                return err
+
+    def stop(self):
+        for dev in self._devices:
+            dev.stop_background_scan()
+
+    def latest(self, units=None):
+        """
+        Returns
+        -------
+        list
+            the latest() readings of every device, in the same order as devices.
+        """
+        return [dev.latest(units) for dev in self._devices]
+
+    @property
+    def devices(self):
+        return self._devices
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __iter__(self):
+        return iter(self._devices)
+
+
 if platform == 'win32':
+    _VALID_UNITS = frozenset({'c', 'celsius', 'f', 'fahrenheit', 'k', 'kelvin', 'r', 'raw', 'none', 'noscale', 'v',
+                              'volts', 'volt', 'voltage'})
+    _UNAVAILABLE_AFTER = 3  # consecutive failed reads before a channel is skipped, see _get_temp_channels()
+
+    try:  # mcculw names used on every read, looked up only once
+        _ul_t_in = ul.t_in
+        _FILTER_OPTS = (enums.TInOptions.NOFILTER, enums.TInOptions.FILTER)  # indexed by averaged
+        _BOARDINFO = enums.InfoType.BOARDINFO
+        _BI_CHANTCTYPE = enums.BoardInfo.CHANTCTYPE
+        _BI_NUMTEMPCHANS = enums.BoardInfo.NUMTEMPCHANS
+        _BI_NUMIOPORTS = enums.BoardInfo.NUMIOPORTS
+        _BI_NUMADCHANS = enums.BoardInfo.NUMADCHANS
+        _BI_NUMDACHANS = enums.BoardInfo.NUMDACHANS
+        _BI_CLOCK = enums.BoardInfo.CLOCK
+        _BI_DEVMACADDR = enums.BoardInfo.DEVMACADDR
+        _BI_DEVUNIQUEID = enums.BoardInfo.DEVUNIQUEID
+        _BI_DEVSERIALNUM = enums.BoardInfo.DEVSERIALNUM
+    except NameError:  # mcculw not installed
+        pass
+
+    @functools.lru_cache(maxsize=32)
+    def _get_TempScale(units):
+        """
+        Translate a units string into its mcculw.enums.TempScale. The result is stored for every units string seen, so
+        the translation table is only built on the first call for each string.
+
+        Returns
+        -------
+        enums.TempScale
+            If units is valid. Else, return None.
+        """
+        TempScale_dict = {
+            'celsius': enums.TempScale.CELSIUS,
+            'c': enums.TempScale.CELSIUS,
+
+            'fahrenheit': enums.TempScale.FAHRENHEIT,
+            'f': enums.TempScale.FAHRENHEIT,
+
+            'kelvin': enums.TempScale.KELVIN,
+            'k': enums.TempScale.KELVIN,
+
+            'volts': enums.TempScale.VOLTS,
+            'volt': enums.TempScale.VOLTS,
+            'voltage': enums.TempScale.VOLTS,
+            'v': enums.TempScale.VOLTS,
+
+            'raw': enums.TempScale.NOSCALE,
+            'none': enums.TempScale.NOSCALE,
+            'noscale': enums.TempScale.NOSCALE,
+            'r': enums.TempScale.NOSCALE
+        }
+        return TempScale_dict.get(units.lower())
+
     class MccDeviceWindows:
+        __slots__ = (
+            '_board_number',
+            '_ip4_address',
+            '_port',
+            '_default_units',
+            '_default_scale',
+            '_is_connected',
+            '_descriptor',
+            '_thermocouple_types',
+            '_board_config_cache',
+            '_scan_pool',
+            '_unavailable_channels',
+            '_read_error_counts',
+            '_consecutive_errors',
+            '_lock',
+            '_scan_lock',
+            '_scanner',
+            '_temp',
+            '_tc_type',
+        )
+
         def __init__(
                 self,
                 # Connection stuff
@@ -500,7 +1016,29 @@ if platform == 'win32':
             self._ip4_address = ip4_address
             self._port = port
             self._default_units = default_units
+            self._default_scale = self.get_TempScale_units(default_units)  # enums.TempScale for default_units
             self._is_connected = False
+            self._descriptor = None  # ((ip, port), ul.DaqDeviceDescriptor) of the last connect()
+            self._thermocouple_types = None  # read from the device on first use, see thermocouple_types
+            self._board_config_cache = {}  # board info read from the device, see _get_board_config()
+            self._scan_pool = None  # threads for reading channels one at a time, created on first use
+            self._unavailable_channels = 0  # bit n is set once channel n keeps failing, see _get_temp_channels()
+            self._read_error_counts = {}  # channel: number of failed reads, see read_error_counts
+            self._consecutive_errors = {}  # channel: number of failed reads since its last good one
+            self._lock = threading.Lock()  # guards _scan_pool and the channel error state, see _get_temp_channels()
+            self._scan_lock = threading.Lock()  # held for a whole scan, see _scan()
+            self._scanner = None  # AsyncScanner, see start_background_scan()
+            self._temp = _ChannelProxy(
+                lambda: self.number_temp_channels,
+                lambda channel: self.get_temp(channel_n=channel),
+                get_range=lambda low, high: self.get_temp_scan(low_channel=low, high_channel=high),
+            )
+            self._tc_type = _ChannelProxy(
+                lambda: self.number_temp_channels,
+                self._get_cached_thermocouple_type,
+                set=lambda channel, new_tc: self.set_thermocuple_type(channel=channel, new_tc=new_tc),
+                get_range=lambda low, high: list(self.thermocouple_types[low:high + 1]),
+            )
 
             if self._ip4_address is not None and self._port is not None:
                 self.connect()
@@ -529,34 +1067,14 @@ if platform == 'win32':
 
             """
 
-            TempScale_dict = {
-                'celsius': enums.TempScale.CELSIUS,
-                'c': enums.TempScale.CELSIUS,
-
-                'fahrenheit': enums.TempScale.FAHRENHEIT,
-                'f': enums.TempScale.FAHRENHEIT,
-
-                'kelvin': enums.TempScale.KELVIN,
-                'k': enums.TempScale.KELVIN,
-
-                'volts': enums.TempScale.VOLTS,
-                'voltage': enums.TempScale.VOLTS,
-                'v': enums.TempScale.VOLTS,
-
-                'raw': enums.TempScale.NOSCALE,
-                'r': enums.TempScale.NOSCALE
-            }
-
-            try:
-                out = TempScale_dict[units.lower()]
-            except KeyError:
+            out = _get_TempScale(units)
+            if out is None:
                 print('\nERROR: input string "', units, '" for units is not a valid input. Possible inputs:')
                 print('    "celsius"                    or    "c"    ')
                 print('    "fahrenheit"                 or    "f"    ')
                 print('    "kelvin"                     or    "k"    ')
                 print('    "volts", "voltage"           or    "v"    ')
                 print('    "raw",                       or    "r"    ')
-                out = None
             return out
 
         def check_valid_units(self, units):  # TODO: figure out what calibrated and uncalibrated is
@@ -587,12 +1105,29 @@ if platform == 'win32':
             elif type(units) is not str:
                 return 'ERROR: input type should be string. Type ' + str(type(units)) + ' not supported.'
 
-            units_set = {None, 'c', 'celsius', 'f', 'fahrenheit', 'k', 'kelvin', 'r', 'raw', 'none', 'noscale', 'v',
-                         'volts', 'volt', 'voltage'}
-
-            if units.lower() not in units_set:
+            if units.lower() not in _VALID_UNITS:
                 return 'ERROR: units ' + str(units) + ' not supported'
 
+        def _resolve_scale(self, units):
+            """
+            Validate units and translate them to a TempScale in one step. None resolves to the scale stored for the
+            default units, without any checks.
+
+            Returns
+            -------
+            enums.TempScale
+                If units are valid
+            str
+                Else, return error string
+            """
+            if units is None:
+                return self._default_scale
+            if type(units) is str:
+                scale = _get_TempScale(units)
+                if scale is not None:
+                    return scale
+            return self.check_valid_units(units)
+
         def check_valid_temp_channel(self, channel):
             """
             Compares the input temperature channel with the number of temperature channels in the device to determine
@@ -613,31 +1148,68 @@ if platform == 'win32':
             if type(channel) is not int:
                 return 'ERROR: channel input must be int. type ' + str(type(channel)) + ' not supported.'
 
-            if not (0 <= channel < self.number_temp_channels):
-                return 'ERROR: channel ' + str(channel) + ' not valid. This unit has ' + str(
-                    self.number_temp_channels) + ' channels, starting from channel 0.'
+            n = self.number_temp_channels
+            if not (0 <= channel < n):
+                return 'ERROR: channel ' + str(channel) + ' not valid. This unit has ' + str(n) + \
+                    ' channels, starting from channel 0.'
 
         # ----------------
         # Connection and board info
         # ----------------
+        @staticmethod
+        def discover(number_of_devices=100):
+            """
+            Find the MCC ethernet devices on the local network. The universal library sends a single discovery
+            broadcast and collects all the replies, so this is much faster than trying IP addresses one at a time.
+
+            Parameters
+            ----------
+            number_of_devices : int
+                maximum number of devices to return.
+
+            Returns
+            -------
+            list of tuple
+                (model, unique_id, descriptor) for each device found. For ethernet devices, unique_id is the MAC
+                address. The descriptor can be passed to ul.create_daq_device().
+            """
+            descriptors = ul.get_daq_device_inventory(enums.InterfaceType.ETHERNET, number_of_devices)
+            return [(d.product_name, d.unique_id, d) for d in descriptors]
+
         def connect(self, ip=None, port=None):
             if (self._ip4_address is None and ip is None) or (self._port is None and port is None) :
                 return "ERROR: need to give an IP address and port first."
 
-            ul.ignore_instacal()
             if ip is None:
                 ip = self._ip4_address
             if port is None:
                 port = self._port
+            if type(ip) is not str or type(port) is not int:  # would only fail inside the UL after the timeout
+                return 'ERROR: ip must be a str and port an int. Got ' + repr(ip) + ' and ' + repr(port)
+
+            ul.ignore_instacal()
+            if self._descriptor is not None and self._descriptor[0] == (ip, port):  # same device, skip the discovery
+                dscrptr = self._descriptor[1]
+            else:
+                try:
+                    dscrptr = ul.get_net_device_descriptor(host=ip, port=port, timeout=2000)
+                except ul.ULError:  # one retry, in case the discovery packet was lost
+                    dscrptr = ul.get_net_device_descriptor(host=ip, port=port, timeout=2000)
+                self._descriptor = ((ip, port), dscrptr)
 
-            dscrptr = ul.get_net_device_descriptor(host=ip, port=port, timeout=2000)
             ul.create_daq_device(board_num=self._board_number, descriptor=dscrptr)
             self._is_connected = True
             print('Connection to', self._ip4_address, 'was succesful')
 
         def disconnect(self):
+            self.stop_background_scan()
             ul.release_daq_device(self._board_number)
             self._is_connected = False
+            self.invalidate_config_cache()
+            with self._lock:
+                pool, self._scan_pool = self._scan_pool, None
+            if pool is not None:
+                pool.shutdown()
 
         @property
         def idn(self):
@@ -651,6 +1223,7 @@ if platform == 'win32':
         def board_number(self, new_num):
             if not self._is_connected:
                 self._board_number = new_num
+                self.invalidate_config_cache()
             else:
                 print('ERROR: board_number cannot be changed while device is connected.')
 
@@ -676,99 +1249,100 @@ if platform == 'win32':
             else:
                 print('ERROR: port cannot be changed while connection is on.')
 
+        def _get_board_config(self, config_item):
+            """
+            Read a board configuration value through ul.get_config, or return the stored value if it was read before.
+            These values are fixed for a board, so they are only read again after disconnect() or
+            invalidate_config_cache().
+
+            Parameters
+            ----------
+            config_item : enums.BoardInfo
+                the configuration item to read.
+
+            Returns
+            -------
+            int
+            """
+            out = self._board_config_cache.get(config_item)
+            if out is None:
+                out = self._board_config_cache[config_item] = ul.get_config(
+                    info_type=_BOARDINFO,
+                    board_num=self._board_number,
+                    dev_num=0,
+                    config_item=config_item
+                )
+            return out
+
+        def _get_board_config_string(self, config_item):
+            """
+            Same as _get_board_config(), for the items read through ul.get_config_string.
+            """
+            key = ('str', config_item)
+            out = self._board_config_cache.get(key)
+            if out is None:
+                out = self._board_config_cache[key] = ul.get_config_string(
+                    info_type=_BOARDINFO,
+                    board_num=self._board_number,
+                    dev_num=0,
+                    config_item=config_item,
+                    max_config_len=255
+                )
+            return out
+
         @property
         def model(self):
-            return ul.get_board_name(self._board_number)
+            name = self._board_config_cache.get('name')
+            if name is None:
+                name = self._board_config_cache['name'] = ul.get_board_name(self._board_number)
+            return name
 
         @property
         def mac_address(self):
-            return ul.get_config_string(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.DEVMACADDR,
-                max_config_len=255
-            )
+            return self._get_board_config_string(_BI_DEVMACADDR)
 
         @property
         def unique_id(self):
-            return ul.get_config_string(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.DEVUNIQUEID,
-                max_config_len=255
-            )
+            return self._get_board_config_string(_BI_DEVUNIQUEID)
 
         @property
         def serial_number(self):
-            return ul.get_config_string(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.DEVSERIALNUM,
-                max_config_len=255
-            )
+            return self._get_board_config_string(_BI_DEVSERIALNUM)
 
         @property
         def number_temp_channels(self):
             """
             :return : int
             """
-            return ul.get_config(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.NUMTEMPCHANS
-            )
+            return self._get_board_config(_BI_NUMTEMPCHANS)
 
         @property
         def number_io_channels(self):
             """
             :return : int
             """
-            return ul.get_config(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.NUMIOPORTS
-            )
+            return self._get_board_config(_BI_NUMIOPORTS)
 
         @property
         def number_ad_channels(self):
             """
             :return : int
             """
-            return ul.get_config(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.NUMADCHANS
-            )
+            return self._get_board_config(_BI_NUMADCHANS)
 
         @property
         def number_da_channels(self):
             """
             :return : int
             """
-            return ul.get_config(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.NUMDACHANS
-            )
+            return self._get_board_config(_BI_NUMDACHANS)
 
         @property
         def clock_frequency_MHz(self):
             """
             :return : int
             """
-            return ul.get_config(
-                info_type=enums.InfoType.BOARDINFO,
-                board_num=self._board_number,
-                dev_num=0,
-                config_item=enums.BoardInfo.CLOCK
-            )
+            return self._get_board_config(_BI_CLOCK)
 
         # -----------------
         # Temperature DAQ's
@@ -794,30 +1368,50 @@ if platform == 'win32':
             str
                 Else, return error string
             """
-            err1 = self.check_valid_units(units)
-            err2 = self.check_valid_temp_channel(channel_n)
-            if err1 is not None:
-                return err1
-            if err2 is not None:
-                return err2
+            scale = self._resolve_scale(units)
+            if type(scale) is str:
+                return scale
+            err = self.check_valid_temp_channel(channel_n)
+            if err is not None:
+                return err
 
-            if averaged:
-                filter_on_off = enums.TInOptions.FILTER
-            else:
-                filter_on_off = enums.TInOptions.NOFILTER
+            if self._scanner is not None and averaged:
+                latest = self._scanner.latest()
+                if latest is not None and latest[channel_n] == latest[channel_n]:  # not nan
+                    out = _convert_from_celsius(float(latest[channel_n]), units or self._default_units)
+                    if out is not None:
+                        return out
 
-            if units is None:
-                units = self._default_units
+            filter_on_off = _FILTER_OPTS[bool(averaged)]
+
+            return self._get_temp_raw(channel_n, scale, filter_on_off)
 
-            out = ul.t_in(
+        def _get_temp_raw(self, channel_n, scale, options):
+            """
+            Read a channel with no input checks. The caller resolves the units and options, so that a sweep over many
+            channels only does it once.
+
+            Parameters
+            ----------
+            channel_n : int
+                a valid temperature channel.
+            scale : enums.TempScale
+                see get_TempScale_units().
+            options : enums.TInOptions
+                FILTER or NOFILTER.
+
+            Returns
+            -------
+            float
+                reading in the units of scale.
+            """
+            return _ul_t_in(
                 board_num=self._board_number,
                 channel=channel_n,
-                scale=self.get_TempScale_units(units.lower()),
-                options=filter_on_off
+                scale=scale,
+                options=options
             )
 
-            return out
-
         def get_temp_all_channels(self, units=None, averaged=True):
             """
             Reads the analog signal out of all available channels. The read values are returned inside a list.
@@ -839,28 +1433,21 @@ if platform == 'win32':
             str
                 If an error occurs, return error string
             """
-            err = self.check_valid_units(units)
-            if err is not None:
-                return err
+            scale = self._resolve_scale(units)
+            if type(scale) is str:
+                return scale
 
-            if units is None:
-                units = self._default_units
+            if self._scanner is not None and averaged:
+                out = self.latest(units)
+                if out is not None:
+                    return out
 
-            out = []
-            for channel in range(self.number_temp_channels):
-                try:
-                    out.append(self.get_temp(channel_n=channel, units=units, averaged=averaged))
-                except ul.ULError:
-                    print('ERROR: Could not read from channel ' + str(channel) + '. Appending None.')
-                    out.append(None)
-                    continue
+            return self._scan(0, self.number_temp_channels - 1, scale, _FILTER_OPTS[bool(averaged)])
 
-            return out
-
-        def get_temp_scan(self, low_channel=0, high_channel=7, units=None, averaged=True):
+        def get_temp_scan(self, low_channel=0, high_channel=7, units=None, averaged=True, as_list=True):
             """
             Reads the analog signal out of a range of channels delimited by the low_channel and the high_channel
-            (inclusive). The read values are returned inside a list.
+            (inclusive). The read values are returned inside a list, or a numpy array.
 
             Parameters
             ----------
@@ -876,6 +1463,9 @@ if platform == 'win32':
             averaged : bool
                 When selected, 10 samples are read from the specified channel and averaged. The average is the reading
                 returned. The maximum acquisiton frequency doesn't change regardless of this parameter.
+            as_list : bool
+                If False, return a numpy float32 array instead of a list, so that the readings can be used in numpy
+                arithmetic directly.
 
             Returns
             -------
@@ -883,33 +1473,200 @@ if platform == 'win32':
                 List containing the temperature or voltage values as a float in the specified units. The index of a
                 value corresponds to its respective channel. If a channel is not available, its respective place in
                 the list will have None.
+            numpy.ndarray
+                If as_list is False. Same as the list, but with nan for channels that are not available.
             str
                 If an error occurs, return error string
             """
-            err1 = self.check_valid_units(units)
+            scale = self._resolve_scale(units)
+            if type(scale) is str:
+                return scale
             err2 = self.check_valid_temp_channel(low_channel)
-            err3 = self.check_valid_temp_channel(high_channel)
-            if err1 is not None:
-                return err1
             if err2 is not None:
                 return err2
+            err3 = self.check_valid_temp_channel(high_channel)
             if err3 is not None:
                 return err3
 
-            if units is None:
-                units = self._default_units
+            out = self._scan(low_channel, high_channel, scale, _FILTER_OPTS[bool(averaged)])
+            if as_list:
+                return out
+            return _readings_to_array(out)
+
+        def _scan(self, low_channel, high_channel, scale, options):
+            """
+            Read the channels from low_channel to high_channel (inclusive) with no input checks. All the channels are
+            read with a single t_in_scan call, unless one of them is known to be unavailable or the call fails. Then
+            they are read one at a time with _get_temp_channels(). Only one scan runs at a time on the board.
 
+            Returns
+            -------
+            list of float
+                readings in the units of scale, None for the channels that could not be read.
+            """
+            with self._scan_lock:  # one scan at a time per board, e.g. the background scanner and a caller
+                span = ((1 << (high_channel - low_channel + 1)) - 1) << low_channel
+                if not self._unavailable_channels & span:  # no channel in the range is known to be unavailable
+                    try:  # read all the channels in a single call to the device
+                        readings = ul.t_in_scan(
+                            board_num=self._board_number,
+                            low_chan=low_channel,
+                            high_chan=high_channel,
+                            scale=scale,
+                            options=options
+                        )
+                    except ul.ULError:  # one or more channels could not be read. Read them one at a time to find which.
+                        pass
+                    else:
+                        if self._consecutive_errors:  # every channel in the range read fine
+                            with self._lock:
+                                for channel in range(low_channel, high_channel + 1):
+                                    self._consecutive_errors.pop(channel, None)
+                        return readings
+
+                return self._get_temp_channels(range(low_channel, high_channel + 1), scale, options)
+
+        def _get_temp_channels(self, channels, scale, options):
+            """
+            Read the temperature of each channel with its own call to _get_temp_raw(). The calls are made concurrently
+            from a thread pool, since each one blocks in the universal library while waiting for the device. A channel
+            that fails _UNAVAILABLE_AFTER reads in a row is remembered as unavailable and skipped in later calls, until
+            invalidate_config_cache() is used. A single failed read only gives None for that call.
+
+            Parameters
+            ----------
+            channels : iterable of int
+                the channels to read. Must be valid temperature channels.
+            scale : enums.TempScale
+                see get_TempScale_units().
+            options : enums.TInOptions
+                FILTER or NOFILTER.
+
+            Returns
+            -------
+            list of float
+                The readings in the same order as channels. If a channel could not be read, its place in the list
+                has None.
+            """
+            with self._lock:
+                if self._scan_pool is None:
+                    self._scan_pool = ThreadPoolExecutor(max_workers=8)
+                pool = self._scan_pool
+                unavailable = self._unavailable_channels
+
+            futures = [
+                (channel, None if unavailable >> channel & 1 else
+                    pool.submit(self._get_temp_raw, channel, scale, options))
+                for channel in channels
+            ]
             out = []
-            for channel in range(low_channel, high_channel + 1):
+            for channel, future in futures:
+                if future is None:
+                    out.append(None)
+                    continue
                 try:
-                    out.append(self.get_temp(channel_n=channel, units=units, averaged=averaged))
+                    out.append(future.result())
                 except ul.ULError:
-                    print('ERROR: Could not read from channel ' + str(channel) + '. Appending None.')
+                    with self._lock:
+                        self._read_error_counts[channel] = self._read_error_counts.get(channel, 0) + 1
+                        in_a_row = self._consecutive_errors.get(channel, 0) + 1
+                        self._consecutive_errors[channel] = in_a_row
+                        if in_a_row >= _UNAVAILABLE_AFTER:
+                            self._unavailable_channels |= 1 << channel
+                    if in_a_row == _UNAVAILABLE_AFTER:  # only log when the channel becomes unavailable
+                        _log.debug('Could not read from channel %d %d times in a row. Skipping it until '
+                                   'invalidate_config_cache().', channel, in_a_row)
                     out.append(None)
-                    continue
+                else:
+                    if channel in self._consecutive_errors:
+                        with self._lock:
+                            self._consecutive_errors.pop(channel, None)
 
             return out
 
+        def start_background_scan(self, rate_hz=10, queue_size=0, cpu=None):
+            """
+            Start a daemon thread that scans all the temperature channels rate_hz times per second, in Celsius and
+            averaged. While it runs, get_temp() and get_temp_all_channels() with averaged=True return the readings from
+            the last scan right away instead of waiting for the device, converted to the requested temperature units.
+            A reading can therefore be up to 1/rate_hz seconds old. Voltages are still read from the device. Use
+            get_temp_scan() when a fresh sample is needed.
+
+            Parameters
+            ----------
+            rate_hz : float
+                number of scans per second.
+            queue_size : int
+                If more than 0, every scan is also put in scan_queue, as a numpy array in Celsius.
+            cpu : int, None
+                If given, pin the scan thread to this CPU core (Linux only).
+
+            Returns
+            -------
+            None
+                If succesful, return None
+            str
+                Else, return error string
+            """
+            if self._scanner is not None:
+                return 'ERROR: background scan is already running. Use stop_background_scan() first.'
+            if rate_hz <= 0:
+                return 'ERROR: rate_hz must be positive.'
+
+            self._scanner = AsyncScanner(self._read_background_scan, 1/rate_hz, queue_size, cpu)
+            self._scanner.start()
+
+        def stop_background_scan(self):
+            """
+            Stop the thread started by start_background_scan(). Does nothing if no background scan is running.
+            """
+            if self._scanner is None:
+                return
+
+            self._scanner.stop()
+            self._scanner = None
+
+        def latest(self, units=None):
+            """
+            Readings of the last background scan, without waiting for the device.
+
+            Parameters
+            ----------
+            units : str, None
+                temperature units. Defaults to the default units.
+
+            Returns
+            -------
+            list of float
+                one reading per channel. Channels that could not be read have None.
+            None
+                If no background scan is running or has finished yet, or units is not a temperature unit.
+            """
+            if self._scanner is None:
+                return None
+            latest = self._scanner.latest()
+            if latest is None:
+                return None
+            out = _convert_from_celsius(latest, units or self._default_units)
+            if out is None:
+                return None
+            return [None if v != v else v for v in out.tolist()]
+
+        @property
+        def scan_queue(self):
+            """
+            queue.Queue with every background scan, or None. See start_background_scan().
+            """
+            if self._scanner is None:
+                return None
+            return self._scanner.queue
+
+        def _read_background_scan(self):
+            readings = self.get_temp_scan(low_channel=0, high_channel=self.number_temp_channels - 1, units='celsius')
+            if type(readings) is str:
+                return None
+            return np.array(readings, dtype=float)  # float64 like the driver readings. None becomes nan
+
         def get_thermocouple_type(self, channel):
             """
             Parameters:
@@ -926,25 +1683,16 @@ if platform == 'win32':
             if err is not None:
                 return err
 
-            tc_type_dict = {
-                1: 'J',
-                2: 'K',
-                3: 'T',
-                4: 'E',
-                5: 'R',
-                6: 'S',
-                7: 'B',
-                8: 'N'
-            }
-
             tc_int = ul.get_config(
-                info_type=enums.InfoType.BOARDINFO,
+                info_type=_BOARDINFO,
                 board_num=self._board_number,
                 dev_num=channel,
-                config_item=enums.BoardInfo.CHANTCTYPE
+                config_item=_BI_CHANTCTYPE
             )
 
-            return tc_type_dict[tc_int]
+            if not 1 <= tc_int < len(_TC_INT_TO_STR):
+                return 'ERROR: unknown TC type code ' + str(tc_int) + ' in channel ' + str(channel)
+            return _TC_INT_TO_STR[tc_int]
 
         def set_thermocuple_type(self, channel, new_tc):
             """
@@ -966,153 +1714,158 @@ if platform == 'win32':
             if err is not None:
                 return err
 
-            tc_type_dict = {
-                'J': 1,
-                'K': 2,
-                'T': 3,
-                'E': 4,
-                'R': 5,
-                'S': 6,
-                'B': 7,
-                'N': 8
-            }
-
             try:
-                val = tc_type_dict[new_tc.upper()]
+                val = _TC_STR_TO_INT[new_tc.upper()]
             except KeyError:
                 return 'TC type ' + new_tc + ' not supported by this device.'
 
             ul.set_config(
-                info_type=enums.InfoType.BOARDINFO,
+                info_type=_BOARDINFO,
                 board_num=self._board_number,
                 dev_num=channel,
-                config_item=enums.BoardInfo.CHANTCTYPE,
+                config_item=_BI_CHANTCTYPE,
                 config_val=val
             )
+            self._thermocouple_types = None
 
-        @property
-        def default_units(self):
-            return self._default_units
-
-        @default_units.setter
-        def default_units(self, new_units=None):
+        def invalidate_config_cache(self):
             """
-            Set the default units as the new_units. First use get_TempScale_unit() to error check the new_units. If no
-            exception is raised, then the default units are set using new_units.
-
-            Parameters
-            ----------
-            new_units : string, None
-                see docstring for self.check_valid_units for valid units.
+            Forget the configuration values read from the device, so that they are read again on next use. Only needed
+            if the configuration of the device was changed by some other program, or to retry channels that could not
+            be read before.
             """
-            err = self.check_valid_units(new_units)
-            if err is not None:
-                print(err)
-            else:
-                if new_units is None:
-                    new_units = 'celsius'
-
-                self._default_units = new_units.lower()
-
-        @property
-        def thermocouple_type_ch0(self):
-            return self.get_thermocouple_type(channel=0)
-
-        @thermocouple_type_ch0.setter
-        def thermocouple_type_ch0(self, new_tc_type):
-            self.set_thermocuple_type(channel=0, new_tc=new_tc_type)
-
-        @property
-        def thermocouple_type_ch1(self):
-            return self.get_thermocouple_type(channel=1)
-
-        @thermocouple_type_ch1.setter
-        def thermocouple_type_ch1(self, new_tc_type):
-            self.set_thermocuple_type(channel=1, new_tc=new_tc_type)
+            self._thermocouple_types = None
+            self._board_config_cache.clear()
+            with self._lock:
+                self._unavailable_channels = 0
+                self._consecutive_errors.clear()
+
+        def _get_cached_thermocouple_type(self, channel):
+            tc_types = self.thermocouple_types
+            if 0 <= channel < len(tc_types):
+                return tc_types[channel]
+            return self.get_thermocouple_type(channel)  # returns the error string for the invalid channel
 
         @property
-        def thermocouple_type_ch2(self):
-            return self.get_thermocouple_type(channel=2)
-
-        @thermocouple_type_ch2.setter
-        def thermocouple_type_ch2(self, new_tc_type):
-            self.set_thermocuple_type(channel=2, new_tc=new_tc_type)
-
-        @property
-        def thermocouple_type_ch3(self):
-            return self.get_thermocouple_type(channel=3)
-
-        @thermocouple_type_ch3.setter
-        def thermocouple_type_ch3(self, new_tc_type):
-            self.set_thermocuple_type(channel=3, new_tc=new_tc_type)
-
-        @property
-        def thermocouple_type_ch4(self):
-            return self.get_thermocouple_type(channel=4)
-
-        @thermocouple_type_ch4.setter
-        def thermocouple_type_ch4(self, new_tc_type):
-            self.set_thermocuple_type(channel=4, new_tc=new_tc_type)
-
-        @property
-        def thermocouple_type_ch5(self):
-            return self.get_thermocouple_type(channel=5)
+        def read_error_counts(self):
+            """
+            Number of failed reads of each channel during scans, since the instance was created.
 
-        @thermocouple_type_ch5.setter
-        def thermocouple_type_ch5(self, new_tc_type):
-            self.set_thermocuple_type(channel=5, new_tc=new_tc_type)
+            Returns
+            -------
+            dict
+                channel: count. Channels that never failed are not included.
+            """
+            with self._lock:
+                return dict(self._read_error_counts)
 
         @property
-        def thermocouple_type_ch6(self):
-            return self.get_thermocouple_type(channel=6)
+        def thermocouple_types(self):
+            """
+            Thermocouple type of every temperature channel. The types are read from the device on first access and
+            stored, since they only change through set_thermocuple_type().
 
-        @thermocouple_type_ch6.setter
-        def thermocouple_type_ch6(self, new_tc_type):
-            self.set_thermocuple_type(channel=6, new_tc=new_tc_type)
+            Returns
+            -------
+            tuple of str
+                TC-type of each channel, starting from channel 0.
+            """
+            if self._thermocouple_types is None:
+                self._thermocouple_types = tuple(
+                    self.get_thermocouple_type(channel) for channel in range(self.number_temp_channels)
+                )
+            return self._thermocouple_types
 
         @property
-        def thermocouple_type_ch7(self):
-            return self.get_thermocouple_type(channel=7)
-
-        @thermocouple_type_ch7.setter
-        def thermocouple_type_ch7(self, new_tc_type):
-            self.set_thermocuple_type(channel=7, new_tc=new_tc_type)
+        def temp(self):
+            """
+            Temperature of each channel in the default units. temp[n] reads channel n, temp[low:high] reads a range
+            of channels with a single scan.
+            """
+            return self._temp
 
         @property
-        def temp_ch0(self):
-            return self.get_temp(channel_n=0)
+        def tc_type(self):
+            """
+            Thermocouple type of each channel. tc_type[n] = 'k' sets the type of channel n.
+            """
+            return self._tc_type
 
         @property
-        def temp_ch1(self):
-            return self.get_temp(channel_n=1)
+        def default_units(self):
+            return self._default_units
 
-        @property
-        def temp_ch2(self):
-            return self.get_temp(channel_n=2)
+        @default_units.setter
+        def default_units(self, new_units=None):
+            """
+            Set the default units as the new_units. The units are translated to their TempScale here, once, so that
+            reads in the default units do not need to check them again.
 
-        @property
-        def temp_ch3(self):
-            return self.get_temp(channel_n=3)
+            Parameters
+            ----------
+            new_units : string, None
+                see docstring for self.check_valid_units for valid units. None sets celsius.
+            """
+            if new_units is None:
+                new_units = 'celsius'
 
-        @property
-        def temp_ch4(self):
-            return self.get_temp(channel_n=4)
+            scale = self._resolve_scale(new_units)
+            if type(scale) is str:
+                print(scale)
+            else:
+                self._default_units = new_units.lower()
+                self._default_scale = scale
 
-        @property
-        def temp_ch5(self):
-            return self.get_temp(channel_n=5)
+        # Per-channel attributes: temp_ch0, temp_ch1, ... and thermocouple_type_ch0, thermocouple_type_ch1, ...
+        def __getattr__(self, name):
+            match = _CHANNEL_ATTR.fullmatch(name)
+            if match is None:
+                raise AttributeError(type(self).__name__ + ' object has no attribute ' + repr(name))
 
-        @property
-        def temp_ch6(self):
-            return self.get_temp(channel_n=6)
+            kind, channel = match.groups()
+            if kind == 'temp_ch':
+                return self.get_temp(channel_n=int(channel))
+            return self._get_cached_thermocouple_type(int(channel))
 
-        @property
-        def temp_ch7(self):
-            return self.get_temp(channel_n=7)
+        def __setattr__(self, name, value):
+            if name.startswith('thermocouple_type_ch'):
+                match = _CHANNEL_ATTR.fullmatch(name)
+                if match is not None:
+                    self.set_thermocuple_type(channel=int(match.group(2)), new_tc=value)
+                    return
+            object.__setattr__(self, name, value)
 
 
 if platform == 'linux' or platform == 'linux2':
+    _LINUX_UNITS = {  # units string: TempScale code used by uldaq
+        'celsius': 1,
+        'c': 1,
+        'fahrenheit': 2,
+        'f': 2,
+        'kelvin': 3,
+        'k': 3,
+        'volts': 4,
+        'v': 4,
+        'raw': 5,
+        'r': 5
+    }
+
     class MccDeviceLinux(DaqDevice):
+        # The attributes of uldaq's DaqDevice stay in its own storage. The ones set by this class get slot access.
+        __slots__ = (
+            '_default_units',
+            '_default_scale',
+            '_scanner',
+            '_number_temp_channels',
+            '_scan_pool',
+            '_lock',
+            '_scan_lock',
+            '_ai',
+            '_ai_config',
+            '_temp',
+            '_tc_type',
+        )
+
         def __init__(
                 self,
                 ip4_address,
@@ -1134,26 +1887,44 @@ if platform == 'linux' or platform == 'linux2':
             d = uldaq.get_net_daq_device_descriptor(ip4_address, port, ifc_name=None, timeout=2)
             super().__init__(d)
             self._default_units = default_units
+            self._default_scale = self.get_TempScale_unit(default_units)
+            self._scanner = None  # AsyncScanner, see start_background_scan()
+            self._number_temp_channels = None  # read from the device on first use, see number_temp_channels
+            self._scan_pool = None  # threads for reading channels one at a time, created on first use
+            self._lock = threading.Lock()  # guards _scan_pool, see _scan()
+            self._scan_lock = threading.Lock()  # held for a whole scan, see _scan()
+            self._ai = None  # AiDevice and AiConfig of the device, see _get_ai() and _get_ai_config()
+            self._ai_config = None
+            self._temp = _ChannelProxy(
+                lambda: self.number_temp_channels,
+                lambda channel: self.get_temp(channel_n=channel),
+                get_range=lambda low, high: self.get_temp_scan(low_channel=low, high_channel=high),
+            )
+            self._tc_type = _ChannelProxy(
+                lambda: self.number_temp_channels,
+                self.get_thermocouple_type,
+                set=self.set_thermocouple_type,
+            )
 
             self.connect()
 
+        @staticmethod
+        def discover():
+            """
+            Find the MCC ethernet devices on the local network. uldaq sends a single discovery broadcast and collects
+            all the replies, so this is much faster than trying IP addresses one at a time.
+
+            Returns
+            -------
+            list of tuple
+                (model, unique_id, descriptor) for each device found. For ethernet devices, unique_id is the MAC
+                address.
+            """
+            descriptors = uldaq.get_daq_device_inventory(uldaq.InterfaceType.ETHERNET)
+            return [(d.product_name, d.unique_id, d) for d in descriptors]
+
         def get_TempScale_unit(self, units):
-            units_dict = {
-                'celsius': 1,
-                'c': 1,
-                'fahrenheit': 2,
-                'f': 2,
-                'kelvin': 3,
-                'k': 3,
-                'volts': 4,
-                'v': 4,
-                'raw': 5,
-                'r': 5
-            }
-            try:
-                return units_dict[units.lower()]
-            except KeyError:
-                return None
+            return _LINUX_UNITS.get(units.lower())
 
         def check_valid_units(self, units):  # TODO: figure out what calibrated and uncalibrated is
             """
@@ -1183,11 +1954,29 @@ if platform == 'linux' or platform == 'linux2':
             elif type(units) is not str:
                 return 'ERROR: input type should be string. Type ' + str(type(units)) + ' not supported.'
 
-            units_set = {None, 'c', 'celsius', 'f', 'fahrenheit', 'k', 'kelvin', 'r', 'raw', 'v', 'volts'}
-
-            if units.lower() not in units_set:
+            if units.lower() not in _LINUX_UNITS:
                 return 'ERROR: units ' + str(units) + ' not supported'
 
+        def _resolve_scale(self, units):
+            """
+            Validate units and translate them to a TempScale in one step. None resolves to the scale stored for the
+            default units, without any checks.
+
+            Returns
+            -------
+            uldaq.TempScale
+                If units are valid
+            str
+                Else, return error string
+            """
+            if units is None:
+                return self._default_scale
+            if type(units) is str:
+                scale = _LINUX_UNITS.get(units.lower())
+                if scale is not None:
+                    return scale
+            return self.check_valid_units(units)
+
         def check_valid_temp_channel(self, channel):
             """
             Compares the input temperature channel with the number of temperature channels in the device to determine
@@ -1208,9 +1997,10 @@ if platform == 'linux' or platform == 'linux2':
             if type(channel) is not int:
                 return 'ERROR: channel input must be int. type ' + str(type(channel)) + ' not supported.'
 
-            if not (0 <= channel < self.number_temp_channels):
-                return 'ERROR: channel ' + str(channel) + ' not valid. This unit has ' + str(
-                    self.number_temp_channels) + ' channels, starting from channel 0.'
+            n = self.number_temp_channels
+            if not (0 <= channel < n):
+                return 'ERROR: channel ' + str(channel) + ' not valid. This unit has ' + str(n) + \
+                    ' channels, starting from channel 0.'
 
         def get_temp(self, channel_n=0, units=None):
             """
@@ -1230,19 +2020,35 @@ if platform == 'linux' or platform == 'linux2':
             str
                 Else, return error string
             """
-            err1 = self.check_valid_units(units)
-            if err1 is not None:
-                return err1
-            err2 = self.check_valid_temp_channel(channel_n)
-            if err2 is not None:
-                return err2
+            scale = self._resolve_scale(units)
+            if type(scale) is str:
+                return scale
+            err = self.check_valid_temp_channel(channel_n)
+            if err is not None:
+                return err
 
-            if units is None:
-                units = self._default_units
+            return self._get_temp_raw(channel_n, scale)
+
+        def _get_ai(self):
+            """
+            The analog input subsystem of the device. Looked up once, until disconnect().
+            """
+            if self._ai is None:
+                self._ai = self.get_ai_device()
+            return self._ai
 
-            return self.get_ai_device().t_in(channel=channel_n, scale=self.get_TempScale_unit(units.lower()))
+        def _get_ai_config(self):
+            if self._ai_config is None:
+                self._ai_config = self._get_ai().get_config()
+            return self._ai_config
 
-        def get_temp_scan(self, low_channel=0, high_channel=7, units=None):
+        def _get_temp_raw(self, channel_n, scale):
+            """
+            Read a channel with no input checks. The caller resolves the units, see get_TempScale_unit().
+            """
+            return self._get_ai().t_in(channel=channel_n, scale=scale)
+
+        def get_temp_scan(self, low_channel=0, high_channel=7, units=None, as_list=True):
             """
             Reads the analog signal out of a range of channels delimited by the low_channel and the high_channel
             (inclusive). The read values are returned inside a list.
@@ -1255,6 +2061,8 @@ if platform == 'linux' or platform == 'linux2':
                 the channel on which to stop the scan. Defaults to channel 7.
             units : str, None
                 check docstring for self.check_valid_units for valid input units.
+            as_list : bool
+                If False, return a numpy float32 array instead of a list.
 
             Returns
             -------
@@ -1262,24 +2070,84 @@ if platform == 'linux' or platform == 'linux2':
                 List containing the temperature or voltage values as a float in the specified units. The index of a
                 value corresponds to its respective channel. If a channel is not available, its respective place in
                 the list will have None.
+            numpy.ndarray
+                If as_list is False.
             str
                 If an error occurs, return error string
             """
-            err1 = self.check_valid_units(units)
+            scale = self._resolve_scale(units)
+            if type(scale) is str:
+                return scale
             err2 = self.check_valid_temp_channel(low_channel)
-            err3 = self.check_valid_temp_channel(high_channel)
-            if err1 is not None:
-                return err1
             if err2 is not None:
                 return err2
+            err3 = self.check_valid_temp_channel(high_channel)
             if err3 is not None:
                 return err3
 
-            if units is None:
-                units = self._default_units
+            out = self._scan(low_channel, high_channel, scale)
+            if as_list:
+                return out
+            return _readings_to_array(out)
+
+        def get_temp_all_channels(self, units=None):
+            """
+            Reads the analog signal out of all available channels. The read values are returned inside a list. All the
+            channels are read with a single t_in_list call. If that fails, each channel is read on its own, concurrently
+            from a thread pool, and channels that cannot be read get None.
+
+            Parameters
+            ----------
+            units : str, None
+                check docstring for self.check_valid_units for valid input units.
+
+            Returns
+            -------
+            list of float
+                List containing the readings as a float in the specified units. The index of a value corresponds to its
+                respective channel.
+            str
+                If an error occurs, return error string
+            """
+            scale = self._resolve_scale(units)
+            if type(scale) is str:
+                return scale
+
+            return self._scan(0, self.number_temp_channels - 1, scale)
+
+        def _scan(self, low_channel, high_channel, scale):
+            """
+            Read the channels from low_channel to high_channel (inclusive) with no input checks. All the channels are
+            read with a single t_in_list call. If that fails, each channel is read on its own, concurrently from a
+            thread pool, and channels that cannot be read get None. Only one scan runs at a time on the device.
 
-            return self.get_ai_device().t_in_list(low_chan=low_channel, high_chan=high_channel,
-                                                  scale=self.get_TempScale_unit(units.lower()))
+            Returns
+            -------
+            list of float
+                readings in the units of scale.
+            """
+            with self._scan_lock:  # one scan at a time per device, e.g. the background scanner and a caller
+                try:
+                    return self._get_ai().t_in_list(low_chan=low_channel, high_chan=high_channel, scale=scale)
+                except uldaq.ULException:  # one or more channels could not be read. Read them one at a time.
+                    pass
+
+                with self._lock:
+                    if self._scan_pool is None:
+                        self._scan_pool = ThreadPoolExecutor(max_workers=8)
+                    pool = self._scan_pool
+
+                channels = range(low_channel, high_channel + 1)
+                futures = [pool.submit(self._get_temp_raw, channel, scale) for channel in channels]
+                out = []
+                for channel, future in zip(channels, futures):
+                    try:
+                        out.append(future.result())
+                    except uldaq.ULException:
+                        _log.debug('Could not read from channel %d. Appending None.', channel)
+                        out.append(None)
+
+                return out
 
         def get_thermocouple_type(self, channel):
             """
@@ -1297,19 +2165,10 @@ if platform == 'linux' or platform == 'linux2':
             if err is not None:
                 return err
 
-            tc_type_dict = {
-                1: 'J',
-                2: 'K',
-                3: 'T',
-                4: 'E',
-                5: 'R',
-                6: 'S',
-                7: 'B',
-                8: 'N'
-            }
-
-            tc_int = self.get_ai_device().get_config().get_chan_tc_type(channel=channel)
-            return tc_type_dict[tc_int]
+            tc_int = self._get_ai_config().get_chan_tc_type(channel=channel)
+            if not 1 <= tc_int < len(_TC_INT_TO_STR):
+                return 'ERROR: unknown TC type code ' + str(tc_int) + ' in channel ' + str(channel)
+            return _TC_INT_TO_STR[tc_int]
 
         def set_thermocouple_type(self, channel, new_tc):
             """
@@ -1327,23 +2186,107 @@ if platform == 'linux' or platform == 'linux2':
             str
                 Else, return an error string
             """
-            tc_type_dict = {
-                'J': 1,
-                'K': 2,
-                'T': 3,
-                'E': 4,
-                'R': 5,
-                'S': 6,
-                'B': 7,
-                'N': 8
-            }
+            err = self.check_valid_temp_channel(channel)
+            if err is not None:
+                return err
 
             try:
-                val = tc_type_dict[new_tc.upper()]
+                val = _TC_STR_TO_INT[new_tc.upper()]
             except KeyError:
                 return 'ERROR: TC Type ' + str(new_tc) + ' not supported'
 
-            self.get_ai_device().get_config().set_chan_tc_type(channel=channel, tc_type=val)
+            self._get_ai_config().set_chan_tc_type(channel=channel, tc_type=val)
+
+        def start_background_scan(self, rate_hz=10, queue_size=0, cpu=None):
+            """
+            Start a daemon thread that scans all the temperature channels rate_hz times per second, in Celsius. Use
+            latest() to get the last scan without waiting for the device.
+
+            Parameters
+            ----------
+            rate_hz : float
+                number of scans per second.
+            queue_size : int
+                If more than 0, every scan is also put in scan_queue, as a numpy array in Celsius.
+            cpu : int, None
+                If given, pin the scan thread to this CPU core (Linux only).
+
+            Returns
+            -------
+            None
+                If succesful, return None
+            str
+                Else, return error string
+            """
+            if self._scanner is not None:
+                return 'ERROR: background scan is already running. Use stop_background_scan() first.'
+            if rate_hz <= 0:
+                return 'ERROR: rate_hz must be positive.'
+
+            self._scanner = AsyncScanner(self._read_background_scan, 1/rate_hz, queue_size, cpu)
+            self._scanner.start()
+
+        def stop_background_scan(self):
+            """
+            Stop the thread started by start_background_scan(). Does nothing if no background scan is running.
+            """
+            if self._scanner is None:
+                return
+
+            self._scanner.stop()
+            self._scanner = None
+
+        def latest(self, units=None):
+            """
+            Readings of the last background scan, without waiting for the device.
+
+            Parameters
+            ----------
+            units : str, None
+                temperature units. Defaults to the default units.
+
+            Returns
+            -------
+            list of float
+                one reading per channel. Channels that could not be read have None.
+            None
+                If no background scan is running or has finished yet, or units is not a temperature unit.
+            """
+            if self._scanner is None:
+                return None
+            latest = self._scanner.latest()
+            if latest is None:
+                return None
+            out = _convert_from_celsius(latest, units or self._default_units)
+            if out is None:
+                return None
+            return [None if v != v else v for v in out.tolist()]
+
+        @property
+        def scan_queue(self):
+            """
+            queue.Queue with every background scan, or None. See start_background_scan().
+            """
+            if self._scanner is None:
+                return None
+            return self._scanner.queue
+
+        def _read_background_scan(self):
+            readings = self.get_temp_scan(low_channel=0, high_channel=self.number_temp_channels - 1, units='celsius')
+            if type(readings) is str:
+                return None
+            return np.array(readings, dtype=float)  # float64 like the driver readings. None becomes nan
+
+        def disconnect(self):
+            self.stop_background_scan()
+            self._number_temp_channels = None
+            self._ai = None
+            self._ai_config = None
+            with self._lock:
+                pool, self._scan_pool = self._scan_pool, None
+            if pool is not None:
+                pool.shutdown()
+            super().disconnect()
 
         @property
         def idn(self):
@@ -1355,51 +2298,48 @@ if platform == 'linux' or platform == 'linux2':
 
         @property
         def number_temp_channels(self):
-            return self.get_ai_device().get_info().get_num_chans()
-
-        @property
-        def default_units(self):
-            return self._default_units
-
-        @default_units.setter
-        def default_units(self, new_units):
-            err = self.check_valid_units(new_units)
-            if err is None:
-                self._default_units = new_units
-            else:
-                print(err)
+            if self._number_temp_channels is None:  # fixed for a device, so only read it once
+                self._number_temp_channels = self._get_ai().get_info().get_num_chans()
+            return self._number_temp_channels
 
         @property
-        def temp_ch0(self):
-            return self.get_temp(channel_n=0)
-
-        @property
-        def temp_ch1(self):
-            return self.get_temp(channel_n=1)
+        def temp(self):
+            """
+            Temperature of each channel in the default units. temp[n] reads channel n, temp[low:high] reads a range
+            of channels with a single scan.
+            """
+            return self._temp
 
         @property
-        def temp_ch2(self):
-            return self.get_temp(channel_n=2)
+        def tc_type(self):
+            """
+            Thermocouple type of each channel. tc_type[n] = 'k' sets the type of channel n.
+            """
+            return self._tc_type
 
         @property
-        def temp_ch3(self):
-            return self.get_temp(channel_n=3)
+        def default_units(self):
+            return self._default_units
 
-        @property
-        def temp_ch4(self):
-            return self.get_temp(channel_n=4)
+        @default_units.setter
+        def default_units(self, new_units):
+            if new_units is None:
+                new_units = 'celsius'
 
-        @property
-        def temp_ch5(self):
-            return self.get_temp(channel_n=5)
+            scale = self._resolve_scale(new_units)
+            if type(scale) is str:
+                print(scale)
+            else:
+                self._default_units = new_units.lower()
+                self._default_scale = scale
 
-        @property
-        def temp_ch6(self):
-            return self.get_temp(channel_n=6)
+        # Per-channel attributes: temp_ch0, temp_ch1, ...
+        def __getattr__(self, name):
+            match = _CHANNEL_ATTR.fullmatch(name)
+            if match is None or match.group(1) != 'temp_ch':
+                raise AttributeError(type(self).__name__ + ' object has no attribute ' + repr(name))
 
-        @property
-        def temp_ch7(self):
-            return self.get_temp(channel_n=7)
+            return self.get_temp(channel_n=int(match.group(2)))
 
 
 # =====================================================================================================================
@@ -368,6 +368,7 @@ def server_loop(asm_dict):
                 t0_dict, out_dict = update_heaters(asm_dict, t0_dict)
 
         conn.setblocking(False)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # replies are tiny, send them right away
         print(f"Connected by {addr}")
         with conn:  # with connection: regulate oven, then listen for commands to carry on.
             while True:
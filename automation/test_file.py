@@ -25,7 +25,7 @@ def testing_GM3(gaussmeter):
 
     print(gaussmeter.idn)
 
-    data = [gaussmeter.get_instantenous_data_t0()]
+    data = [gaussmeter.reset_time()]
 
     # print()
     # time_initial = time.time()
@@ -39,7 +39,7 @@ def testing_GM3(gaussmeter):
         print(point)
         data.append(point)
 
-    gaussmeter.write(bytes.fromhex('04'*6))
+    gaussmeter.reset_time()
 
     gaussmeter._command_('KILL_ALL_PROCESS')
     gaussmeter.close()
@@ -260,27 +260,27 @@ def testing_rga(rga):
         ani = anim.FuncAnimation(fig, animate, interval=2000)
         plt.show()
 
-    rga.flush_buffers()
-    print(rga.idn)
-    rga.flush_buffers()
+    out_lines = []  # printed all at once at the end, so that terminal writes do not slow down the RGA queries
+    out_lines.append(str(rga.idn))  # read by the handshake in Srs100.__init__, no query needed
 
-    print('0\n\r')
+    out_lines.append('0\n\r')
 
-    print('setting RGA filament on')
-    print(rga.set_ionizer_filament_state(state=True))
-    print('RGA filament is on')
-    print('filament current:')
-    print(rga.get_ionizer_filament_current())
+    out_lines.append('setting RGA filament on')
+    out_lines.append(str(rga.set_ionizer_filament_state(state=True)))
+    out_lines.append('RGA filament is on')
+    out_lines.append('filament current:')
+    out_lines.append(str(rga.get_ionizer_filament_current()))
     # time.sleep(5)
-    print()
+    out_lines.append('')
 
-    # print('setting RGA filament off')
-    # print(rga.set_ionizer_filament_state(state=False))
-    # print('RGA filament is off')
-    # print('filament current:')
-    print(rga.get_ionizer_filament_current())
+    # out_lines.append('setting RGA filament off')
+    # out_lines.append(str(rga.set_ionizer_filament_state(state=False)))
+    # out_lines.append('RGA filament is off')
+    # out_lines.append('filament current:')
+    out_lines.append(str(rga.get_ionizer_filament_current()))
 
-    print(rga.status_byte)
+    out_lines.append(str(rga.status_byte))
+    print('\n'.join(out_lines), flush=True)
 
     # p = rga.get_analog_scan()
 
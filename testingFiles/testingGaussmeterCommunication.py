@@ -9,6 +9,9 @@ import sys
 import time
 # import bytes
 
+NEXT_PACKET = bytes.fromhex('08' * 6)
+ACK_DONE = bytes.fromhex('07')
+
 
 def main():
     gaussmeter = serial.Serial(port='COM3', baudrate=115200, timeout=5, stopbits=1, parity=serial.PARITY_NONE,
@@ -24,9 +27,9 @@ def main():
     output += r.decode('utf-8')
 
     count = 0
-    while ack != bytes.fromhex('07'):
+    while ack != ACK_DONE:
         print(count)
-        gaussmeter.write(bytes.fromhex('08'*6))
+        gaussmeter.write(NEXT_PACKET)
         r = gaussmeter.read(20)
         ack = gaussmeter.read(1)
 
@@ -9,12 +9,7 @@ from bitarray import bitarray
 from bitarray import util
 
 def binary_to_hex_byte(byte):
-    hex_string = hex(int(byte, 2))
-    # remove 0x and pad with 0
-
-    hex_string = hex_string[2:].zfill(2)
-
-    return bytes.fromhex(hex_string)
+    return bytes((int(byte, 2),))  # no need to go through a hex string
 
 
 def main():